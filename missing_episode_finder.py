@@ -5,47 +5,62 @@ from __future__ import annotations
 
 import argparse
 import curses
-import gzip
 import os
 import re
 import sys
 import urllib.error
 import urllib.parse
-import urllib.request
-import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from functools import lru_cache
 from html.parser import HTMLParser
-from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
-
-from title_lookup_service import build_headers, fetch_csfd_results
-
-VIDEO_EXTENSIONS = {
-    ".mkv",
-    ".mp4",
-    ".avi",
-    ".mov",
-    ".ts",
-    ".wmv",
-    ".mpg",
-    ".mpeg",
-    ".flv",
-    ".iso",
-}
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from title_lookup_service import (
+    CSFD_SESSION,
+    DEFAULT_CACHE_DIR,
+    PersistentCache,
+    build_headers,
+    fetch_csfd_results,
+)
 
-DEFAULT_CSFD_MAX_RESULTS = 5
+VIDEO_EXTENSIONS = frozenset(
+    {
+        ".mkv",
+        ".mp4",
+        ".avi",
+        ".mov",
+        ".ts",
+        ".wmv",
+        ".mpg",
+        ".mpeg",
+        ".flv",
+        ".iso",
+    }
+)
 
-SEASON_HINT_PATTERN = re.compile(r"(?i)(?:season|series|s)\s*(\d+)")
-SEASON_SHORT_PATTERN = re.compile(r"(?i)^s(\d{1,2})$")
-EPISODE_PATTERNS = [
-    re.compile(r"(?i)[Ss](\d{1,2})[ ._-]*[Ee](\d{1,3})"),
-    re.compile(r"(?i)(\d{1,2})x(\d{1,3})"),
-]
-EPISODE_ONLY_PATTERN = re.compile(r"(?i)[Ee](\d{1,3})")
-SPECIALS_PATTERN = re.compile(r"(?i)specials")
+DEFAULT_CSFD_MAX_RESULTS = 5
+MAX_DETAIL_FETCH_WORKERS = 8
+MAX_SCAN_WORKERS = 8
+SHOW_DETAIL_CACHE_FILE = "csfd_show_details"
+# Folders nested deeper than this below a show are only walked when they look
+# like season/specials folders (unless --deep is given).
+MAX_FREE_WALK_DEPTH = 2
+
+SEASON_HINT_PATTERN = re.compile(r"(?i)(?:season|series|s)\s*(\d{1,3})(?!\d)", re.ASCII)
+SEASON_SHORT_PATTERN = re.compile(r"(?i)^s(\d{1,2})$", re.ASCII)
+# SxxEyy, NxM and a bare Eyy fallback in one scan. The Eyy branch refuses to
+# start inside an NxM marker so it can never hide one from the typed branches.
+EPISODE_PATTERN = re.compile(
+    r"(?i)(?:[Ss](?P<season>\d{1,2})[ ._-]*[Ee](?P<episode>\d{1,3}))"
+    r"|(?:(?P<alt_season>\d{1,2})x(?P<alt_episode>\d{1,3}))"
+    r"|(?:[Ee](?P<only_episode>\d{1,3})(?!\d*x\d))",
+    re.ASCII,
+)
+SPECIALS_PATTERN = re.compile(r"(?i)specials", re.ASCII)
 SHOW_YEAR_PATTERN = re.compile(r"\((?:19|20)\d{2}(?:/(?:19|20)\d{2})?\)")
 SHOW_NON_ALNUM = re.compile(r"[^0-9a-zA-ZáéěíóúůýščřžÁÉĚÍÓÚŮÝŠČŘŽ ]+")
-SHOW_WHITESPACE = re.compile(r"\s+")
 CSFD_ID_PATTERN = re.compile(r"/film/(\d+)-")
 ORIGIN_SPLITTER = re.compile(r"[,/]")
 SERIES_LINK_PATTERN = re.compile(r"serie-(\d+)/")
@@ -54,6 +69,8 @@ SEASON_TITLE_PATTERN = re.compile(r"(?i)(?:série|séria|season)\s*(\d+)")
 EPISODE_COUNT_PATTERN = re.compile(
     r"(?i)(\d+)\s*(?:díl(?:y|ů)?|epizod(?:y|a)?|episode(?:s)?|část(?:i)?)"
 )
+# Only these tags drive CSFDShowDetailParser state.
+DETAIL_TRACKED_TAGS = frozenset({"a", "div", "h1", "h3", "img", "li", "span", "ul"})
 
 
 @dataclass
@@ -80,6 +97,7 @@ class CSFDShowCandidate:
 class ShowReport:
     name: str
     path: str
+    # Keyed in ascending season order (build_show_report sorts once), so readers iterate as-is.
     seasons: Dict[int, SeasonReport] = field(default_factory=dict)
     missing_seasons: List[int] = field(default_factory=list)
     csfd: Optional[CSFDShowCandidate] = None
@@ -87,10 +105,27 @@ class ShowReport:
     def missing_summary(self) -> List[Tuple[int, List[int]]]:
         return [
             (season, report.missing_episodes)
-            for season, report in sorted(self.seasons.items())
+            for season, report in self.seasons.items()
             if report.missing_episodes
         ]
 
+    def summary(self) -> ShowSummary:
+        return ShowSummary(self.name, self.missing_seasons, self.missing_summary())
+
+
+class ShowSummary(NamedTuple):
+    # The slice of a ShowReport the end-of-run summary needs; lets main drop
+    # full reports (and their episode lists) once they have been printed.
+    name: str
+    missing_seasons: List[int]
+    missing_episodes: List[Tuple[int, List[int]]]
+
+
+class ShowFolder(NamedTuple):
+    name: str
+    key: str
+    path: str
+
 
 def supports_curses() -> bool:
     term = os.environ.get("TERM", "")
@@ -102,8 +137,7 @@ def derive_show_search_query(name: str) -> str:
         return ""
     cleaned = SHOW_YEAR_PATTERN.sub(" ", name)
     cleaned = SHOW_NON_ALNUM.sub(" ", cleaned)
-    cleaned = SHOW_WHITESPACE.sub(" ", cleaned)
-    return cleaned.strip()
+    return " ".join(cleaned.split())
 
 
 class CSFDShowDetailParser(HTMLParser):
@@ -141,8 +175,23 @@ class CSFDShowDetailParser(HTMLParser):
 
     def handle_starttag(self, tag: str, attrs: list) -> None:  # noqa: D401
         attr_map = dict(attrs)
-        class_names = attr_map.get("class", "")
-        class_set = {part.strip() for part in class_names.split() if part.strip()}
+        if tag in DETAIL_TRACKED_TAGS:
+            self._handle_tracked_starttag(tag, attr_map)
+        href = attr_map.get("href")
+        if not href:
+            return
+        match = SERIES_LINK_PATTERN.search(href)
+        if match:
+            try:
+                number = int(match.group(1))
+            except ValueError:
+                number = None
+            if number:
+                self._series_numbers.add(number)
+
+    def _handle_tracked_starttag(self, tag: str, attr_map: Dict[str, Optional[str]]) -> None:
+        class_names = attr_map.get("class") or ""
+        class_set = set(class_names.split())
         if tag == "div" and "origin" in class_set:
             self._in_origin = True
             self._origin_span_depth = 0
@@ -193,17 +242,10 @@ class CSFDShowDetailParser(HTMLParser):
             self._episode_info_parts.clear()
         elif tag == "span" and self._capturing_episode_info:
             self._episode_info_depth += 1
-        href = attr_map.get("href", "")
-        match = SERIES_LINK_PATTERN.search(href)
-        if match:
-            try:
-                number = int(match.group(1))
-            except ValueError:
-                number = None
-            if number:
-                self._series_numbers.add(number)
 
     def handle_endtag(self, tag: str) -> None:  # noqa: D401
+        if tag not in DETAIL_TRACKED_TAGS:
+            return
         if tag == "div" and self._in_origin:
             self._in_origin = False
             self.origins = self._finalize_origins()
@@ -393,27 +435,13 @@ def _select_original_title(
     return header_title.strip() if header_title else None
 
 
-def _decode_csfd_payload(raw: bytes, encoding: str) -> str:
-    codec = encoding.lower()
+def _download_csfd_html(url: str) -> Optional[str]:
+    headers = build_headers()
+    headers["Accept-Encoding"] = "identity"
     try:
-        if "gzip" in codec:
-            return gzip.decompress(raw).decode("utf-8", errors="ignore")
-        if "deflate" in codec:
-            return zlib.decompress(raw).decode("utf-8", errors="ignore")
-        return raw.decode("utf-8", errors="ignore")
-    except (OSError, zlib.error, UnicodeDecodeError):  # pragma: no cover - corrupted payloads
-        return raw.decode("utf-8", errors="ignore")
-
-
-def _download_csfd_html(url: str) -> str:
-    request = urllib.request.Request(url, headers=build_headers())
-    try:
-        with urllib.request.urlopen(request, timeout=10) as response:
-            raw = response.read()
-            encoding = response.headers.get("Content-Encoding", "")
+        return CSFD_SESSION.get_text(url, headers)
     except urllib.error.URLError:  # pragma: no cover - network failure
-        return ""
-    return _decode_csfd_payload(raw, encoding)
+        return None
 
 
 def _with_query_param(url: str, key: str, value: Optional[str]) -> str:
@@ -426,20 +454,25 @@ def _with_query_param(url: str, key: str, value: Optional[str]) -> str:
     return urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, parsed.path, new_query, parsed.fragment))
 
 
-def _merge_paginated_episode_counts(base_url: str, detail: Dict[str, Optional[str]]) -> None:
+def _merge_paginated_episode_counts(base_url: str, detail: Dict[str, Optional[str]]) -> bool:
+    """Fill in season counts from later pages; False if a page could not be downloaded."""
     total = detail.get("total_seasons")
     if not isinstance(total, int) or total <= 0:
-        return
+        return True
     season_counts = dict(detail.get("season_episode_counts") or {})
     if len(season_counts) >= total:
         detail["season_episode_counts"] = season_counts
-        return
+        return True
+    complete = True
     normalized_base = _with_query_param(base_url, "seriePage", None)
     page = 2
     max_pages = min(total, 20)
     while page <= max_pages and len(season_counts) < total:
         page_url = _with_query_param(normalized_base, "seriePage", str(page))
         html = _download_csfd_html(page_url)
+        if html is None:
+            complete = False
+            break
         if not html:
             break
         page_detail = parse_csfd_show_detail(html)
@@ -458,6 +491,19 @@ def _merge_paginated_episode_counts(base_url: str, detail: Dict[str, Optional[st
             break
         page += 1
     detail["season_episode_counts"] = season_counts
+    return complete
+
+
+# Optional on-disk L2 behind the in-memory lru_cache; enabled by main().
+_SHOW_DETAIL_CACHE: Optional[PersistentCache] = None
+
+
+def configure_show_detail_cache(cache_dir: Optional[str]) -> None:
+    global _SHOW_DETAIL_CACHE
+    if _SHOW_DETAIL_CACHE is not None:
+        _SHOW_DETAIL_CACHE.close()
+    _SHOW_DETAIL_CACHE = PersistentCache(os.path.join(cache_dir, SHOW_DETAIL_CACHE_FILE)) if cache_dir else None
+    fetch_csfd_show_detail.cache_clear()
 
 
 @lru_cache(maxsize=128)
@@ -465,11 +511,23 @@ def fetch_csfd_show_detail(url: str) -> Dict[str, Optional[str]]:
     if not url:
         return {}
     absolute_url = urllib.parse.urljoin("https://www.csfd.cz", url)
+    disk_cache = _SHOW_DETAIL_CACHE
+    # Keyed on the full URL: a season page shares its show's id prefix.
+    if disk_cache is not None:
+        cached = disk_cache.get(absolute_url)
+        if cached is not None:
+            return cached
     html = _download_csfd_html(absolute_url)
-    if not html:
+    if html is None:
+        # Transient failures are not written to disk.
         return {}
-    detail = parse_csfd_show_detail(html)
-    _merge_paginated_episode_counts(absolute_url, detail)
+    detail: Dict[str, Optional[str]] = {}
+    complete = True
+    if html:
+        detail = parse_csfd_show_detail(html)
+        complete = _merge_paginated_episode_counts(absolute_url, detail)
+    if disk_cache is not None and complete:
+        disk_cache.set(absolute_url, detail)
     return detail
 
 
@@ -502,7 +560,7 @@ class CSFDLookup:
         return selection
 
     def _build_candidates(self, entries: Sequence[dict]) -> List[CSFDShowCandidate]:
-        built: List[CSFDShowCandidate] = []
+        usable: List[Tuple[dict, str, str]] = []
         for entry in entries:
             title = str(entry.get("title") or "").strip()
             if not title:
@@ -512,7 +570,13 @@ class CSFDLookup:
             url = entry.get("url")
             if not isinstance(url, str) or not url:
                 continue
-            detail = fetch_csfd_show_detail(url)
+            usable.append((entry, title, url))
+        if not usable:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(usable), MAX_DETAIL_FETCH_WORKERS)) as pool:
+            details = list(pool.map(fetch_csfd_show_detail, [url for _, _, url in usable]))
+        built: List[CSFDShowCandidate] = []
+        for (entry, title, url), detail in zip(usable, details):
             if not detail:
                 continue
             media_type = (detail.get("media_type") or "").casefold()
@@ -551,28 +615,24 @@ def format_csfd_display_name(candidate: CSFDShowCandidate) -> str:
 
 
 def is_video_file(name: str) -> bool:
-    _, ext = os.path.splitext(name)
-    return ext.lower() in VIDEO_EXTENSIONS
+    # A leading dot marks a hidden file, not an extension.
+    dot = name.rfind(".")
+    return dot > 0 and name[dot:].lower() in VIDEO_EXTENSIONS
 
 
-def discover_shows(root_path: str) -> List[Tuple[str, str]]:
+def discover_shows(root_path: str) -> List[ShowFolder]:
     try:
-        entries = os.listdir(root_path)
+        with os.scandir(root_path) as entries:
+            shows = [ShowFolder(entry.name, entry.name.casefold(), entry.path) for entry in entries if entry.is_dir()]
     except FileNotFoundError:
         return []
-    shows: List[Tuple[str, str]] = []
-    for entry in sorted(entries):
-        abs_path = os.path.join(root_path, entry)
-        if os.path.isdir(abs_path):
-            shows.append((entry, abs_path))
+    shows.sort()
     return shows
 
 
-def filter_shows(shows: Sequence[Tuple[str, str]], needle: str) -> List[Tuple[str, str]]:
-    if not needle:
-        return list(shows)
-    lowered = needle.lower()
-    return [show for show in shows if lowered in show[0].lower()]
+def filter_shows(shows: Iterable[ShowFolder], needle: str) -> List[Tuple[str, str]]:
+    folded = needle.casefold()
+    return [(name, path) for name, key, path in shows if folded in key]
 
 
 def select_csfd_candidate(show_name: str, candidates: Sequence[CSFDShowCandidate]) -> Optional[CSFDShowCandidate]:
@@ -612,12 +672,30 @@ def prompt_csfd_selection_cli(show_name: str, candidates: Sequence[CSFDShowCandi
         print("Invalid choice, try again.")
 
 
+def _paint_frame(stdscr: "curses._CursesWindow", lines: Sequence[Tuple[int, str, int]]) -> None:  # type: ignore[name-defined]
+    # Each line is (indent, text, attr).
+    height, width = stdscr.getmaxyx()
+    stdscr.erase()
+    for row, (indent, text, attr) in enumerate(lines[:height]):
+        limit = width - indent
+        if limit <= 0:
+            continue
+        try:
+            stdscr.addnstr(row, indent, text, limit, attr)
+        except curses.error:
+            # Writing the bottom-right cell moves the cursor off-screen; the text is still drawn.
+            pass
+
+
 class CSFDShowSelectionTUI:
     def __init__(self, show_name: str, candidates: Sequence[CSFDShowCandidate]):
         self.show_name = show_name
         self.candidates = list(candidates)
         self.selected = 0
         self.outcome: Optional[int] = None
+        self._header = f"CSFD matches for '{show_name}' ({len(self.candidates)})"
+        self._display = [format_csfd_display_name(candidate) for candidate in self.candidates]
+        self._details = [self._format_details(candidate) for candidate in self.candidates]
 
     def run(self) -> Optional[int]:
         try:
@@ -629,33 +707,20 @@ class CSFDShowSelectionTUI:
     def _main(self, stdscr: "curses._CursesWindow") -> None:  # type: ignore[name-defined]
         curses.curs_set(0)
         while True:
-            height, width = stdscr.getmaxyx()
-            stdscr.erase()
-            header = f"CSFD matches for '{self.show_name}' ({len(self.candidates)})"
-            try:
-                stdscr.addnstr(0, 0, header[:width], width)
-                stdscr.addnstr(1, 0, "↑/↓ move • Enter select • q abort"[:width], width)
-            except curses.error:
-                pass
+            height, _ = stdscr.getmaxyx()
+            lines = [
+                (0, self._header, curses.A_NORMAL),
+                (0, "↑/↓ move • Enter select • q abort", curses.A_NORMAL),
+            ]
             visible_rows = max(1, (height - 4) // 2)
             top = max(0, min(self.selected - visible_rows // 2, len(self.candidates) - visible_rows))
-            row = 2
             for idx in range(top, min(len(self.candidates), top + visible_rows)):
-                candidate = self.candidates[idx]
-                prefix = "> " if idx == self.selected else "  "
-                line = f"{prefix}{format_csfd_display_name(candidate)}"
-                attr = curses.A_REVERSE | curses.A_BOLD if idx == self.selected else curses.A_NORMAL
-                try:
-                    stdscr.addnstr(row, 0, line[:width], width, attr)
-                except curses.error:
-                    pass
-                row += 1
-                details = self._format_details(candidate)
-                try:
-                    stdscr.addnstr(row, 2, details[: max(0, width - 2)], max(0, width - 2))
-                except curses.error:
-                    pass
-                row += 1
+                if idx == self.selected:
+                    lines.append((0, f"> {self._display[idx]}", curses.A_REVERSE | curses.A_BOLD))
+                else:
+                    lines.append((0, f"  {self._display[idx]}", curses.A_NORMAL))
+                lines.append((2, self._details[idx], curses.A_NORMAL))
+            _paint_frame(stdscr, lines)
             key = stdscr.getch()
             if key in (curses.KEY_UP, ord("k")):
                 self.selected = max(0, self.selected - 1)
@@ -679,6 +744,8 @@ class ShowSelectionTUI:
         self.candidates = list(candidates)
         self.selected = 0
         self.outcome: Optional[int] = None
+        self._header = f"Matches for '{query}': {len(self.candidates)} show(s)"
+        self._names = [name for name, _ in self.candidates]
 
     def run(self) -> Optional[int]:
         try:
@@ -689,32 +756,34 @@ class ShowSelectionTUI:
 
     def _main(self, stdscr: "curses._CursesWindow") -> None:  # type: ignore[name-defined]
         curses.curs_set(0)
+        # (height, width, top) of the last full frame; None forces a repaint.
+        painted: Optional[Tuple[int, int, int]] = None
+        previous = self.selected
         while True:
             height, width = stdscr.getmaxyx()
-            stdscr.erase()
-            header = f"Matches for '{self.query}': {len(self.candidates)} show(s)"
-            try:
-                stdscr.addnstr(0, 0, header[: width], width)
-            except curses.error:
-                pass
-            instructions = "↑/↓ move • Enter select • q abort"
-            try:
-                stdscr.addnstr(1, 0, instructions[: width], width)
-            except curses.error:
-                pass
             visible = max(1, height - 3)
             top = max(0, min(self.selected - visible // 2, len(self.candidates) - visible))
-            for idx in range(top, min(len(self.candidates), top + visible)):
-                row = idx - top + 2
-                name = self.candidates[idx][0]
-                prefix = "> " if idx == self.selected else "  "
-                attr = curses.A_REVERSE | curses.A_BOLD if idx == self.selected else curses.A_NORMAL
-                try:
-                    stdscr.addnstr(row, 0, (prefix + name)[: width], width, attr)
-                except curses.error:
-                    pass
+            if painted == (height, width, top):
+                # Same viewport, only the highlight moved: touch just those two rows.
+                for idx in {previous, self.selected}:
+                    _, text, attr = self._row(idx)
+                    try:
+                        stdscr.addnstr(idx - top + 2, 0, text, width, attr)
+                    except curses.error:
+                        pass
+            else:
+                lines = [
+                    (0, self._header, curses.A_NORMAL),
+                    (0, "↑/↓ move • Enter select • q abort", curses.A_NORMAL),
+                ]
+                lines.extend(self._row(idx) for idx in range(top, min(len(self.candidates), top + visible)))
+                _paint_frame(stdscr, lines)
+                painted = (height, width, top)
+            previous = self.selected
             key = stdscr.getch()
-            if key in (curses.KEY_UP, ord("k")):
+            if key == curses.KEY_RESIZE:
+                painted = None
+            elif key in (curses.KEY_UP, ord("k")):
                 self.selected = max(0, self.selected - 1)
             elif key in (curses.KEY_DOWN, ord("j")):
                 self.selected = min(len(self.candidates) - 1, self.selected + 1)
@@ -725,6 +794,11 @@ class ShowSelectionTUI:
                 self.outcome = None
                 break
 
+    def _row(self, idx: int) -> Tuple[int, str, int]:
+        if idx == self.selected:
+            return 0, "> " + self._names[idx], curses.A_REVERSE | curses.A_BOLD
+        return 0, "  " + self._names[idx], curses.A_NORMAL
+
 
 def prompt_selection_cli(candidates: Sequence[Tuple[str, str]]):
     print("Multiple shows matched; choose one:")
@@ -756,78 +830,132 @@ def select_show_candidate(query: str, candidates: Sequence[Tuple[str, str]]) ->
     return candidates[selected_idx]
 
 
-def extract_season_hint(parts: Iterable[str]) -> Optional[int]:
-    for part in reversed(list(parts)):
-        normalized = part.strip()
-        if SPECIALS_PATTERN.fullmatch(normalized):
-            return 0
-        match = SEASON_HINT_PATTERN.search(normalized)
-        if match:
-            return int(match.group(1))
-        match_short = SEASON_SHORT_PATTERN.match(normalized)
-        if match_short:
-            return int(match_short.group(1))
+def _season_hint_for_part(part: str) -> Optional[int]:
+    normalized = part.strip()
+    if SPECIALS_PATTERN.fullmatch(normalized):
+        return 0
+    # Whenever the anchored short form ("S01") matches, the broader search
+    # would have returned the same number.
+    match_short = SEASON_SHORT_PATTERN.match(normalized)
+    if match_short:
+        return int(match_short.group(1))
+    match = SEASON_HINT_PATTERN.search(normalized)
+    if match:
+        return int(match.group(1))
     return None
 
 
+# Keyed on show-relative parts, so entries ("Season 01", ...) are shared across
+# shows and scan threads; bounded because it now lives for the whole run.
+@lru_cache(maxsize=4096)
+def _season_hint_cached(parts: Tuple[str, ...]) -> Optional[int]:
+    # The deepest matching component wins, so a directory without its own hint
+    # inherits its parent's cached result instead of re-scanning the ancestors.
+    if not parts:
+        return None
+    hint = _season_hint_for_part(parts[-1])
+    if hint is not None:
+        return hint
+    return _season_hint_cached(parts[:-1])
+
+
+def extract_season_hint(parts: Iterable[str]) -> Optional[int]:
+    return _season_hint_cached(parts if isinstance(parts, tuple) else tuple(parts))
+
+
 def extract_episode_matches(name: str) -> List[Tuple[Optional[int], int]]:
     matches: List[Tuple[Optional[int], int]] = []
-    for pattern in EPISODE_PATTERNS:
-        for season_str, episode_str in pattern.findall(name):
-            matches.append((int(season_str), int(episode_str)))
-    if not matches:
-        for episode_str in EPISODE_ONLY_PATTERN.findall(name):
-            matches.append((None, int(episode_str)))
-    return matches
+    episode_only: List[Tuple[Optional[int], int]] = []
+    append = matches.append
+    for match in EPISODE_PATTERN.finditer(name):
+        season_str, episode_str, alt_season_str, alt_episode_str, only_str = match.groups()
+        if season_str is not None:
+            append((int(season_str), int(episode_str)))
+        elif alt_season_str is not None:
+            append((int(alt_season_str), int(alt_episode_str)))
+        else:
+            episode_only.append((None, int(only_str)))
+    # Bare Eyy markers only count when the name has no season-qualified ones.
+    return matches or episode_only
 
 
-def normalize_episode_numbers(values: Iterable[int]) -> List[int]:
-    unique = sorted({value for value in values if value > 0})
-    return unique
+def _walk_videos(show_path: str, deep: bool = False) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    # Symlinked directories are not followed, like os.walk.
+    stack: List[Tuple[str, Tuple[str, ...]]] = [(show_path, ())]
+    while stack:
+        current_path, rel_parts = stack.pop()
+        prune = not deep and len(rel_parts) >= MAX_FREE_WALK_DEPTH
+        try:
+            with os.scandir(current_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if prune and _season_hint_for_part(entry.name) is None:
+                                continue
+                            stack.append((entry.path, rel_parts + (entry.name,)))
+                        elif is_video_file(entry.name) and entry.is_file():
+                            yield rel_parts, entry.name
+                    except OSError:
+                        continue
+        except OSError:
+            continue
 
 
-def analyze_show(show_name: str, show_path: str, metadata: Optional[CSFDShowCandidate] = None) -> ShowReport:
-    seasons: Dict[int, SeasonReport] = {}
-    for current_root, _, files in os.walk(show_path):
-        rel_root = os.path.relpath(current_root, show_path)
-        rel_parts = [] if rel_root == os.curdir else rel_root.split(os.sep)
-        season_hint = extract_season_hint(rel_parts)
-        for file_name in files:
-            if not is_video_file(file_name):
-                continue
-            matches = extract_episode_matches(file_name)
-            if not matches:
-                if season_hint is not None:
-                    seasons.setdefault(season_hint, SeasonReport(season=season_hint))
+def scan_show_episodes(show_path: str, deep: bool = False) -> Dict[int, Set[int]]:
+    # Pure filesystem pass (safe to run in worker threads): every season seen
+    # maps to the episode numbers found for it, possibly none.
+    season_episodes: Dict[int, Set[int]] = {}
+    last_parts: Optional[Tuple[str, ...]] = None
+    season_hint: Optional[int] = None
+    extract_matches = extract_episode_matches
+    get_episode_set = season_episodes.get
+    for rel_parts, file_name in _walk_videos(show_path, deep=deep):
+        if rel_parts != last_parts:
+            season_hint = extract_season_hint(rel_parts)
+            last_parts = rel_parts
+        matches = extract_matches(file_name)
+        if not matches:
+            if season_hint is not None and season_hint not in season_episodes:
+                season_episodes[season_hint] = set()
+            continue
+        for season_candidate, episode_candidate in matches:
+            season_number = season_candidate if season_candidate is not None else season_hint
+            if season_number is None:
                 continue
-            for season_candidate, episode_candidate in matches:
-                season_number = season_candidate if season_candidate is not None else season_hint
-                if season_number is None:
-                    continue
-                report = seasons.setdefault(season_number, SeasonReport(season=season_number))
-                if episode_candidate is not None:
-                    report.episodes_present.append(episode_candidate)
+            episode_set = get_episode_set(season_number)
+            if episode_set is None:
+                episode_set = season_episodes[season_number] = set()
+            # E00 markers still register the season but are never counted as episodes.
+            if episode_candidate:
+                episode_set.add(episode_candidate)
+    return season_episodes
+
+
+def build_show_report(
+    show_name: str,
+    show_path: str,
+    season_episodes: Dict[int, Set[int]],
+    metadata: Optional[CSFDShowCandidate] = None,
+) -> ShowReport:
     episode_expectations = metadata.season_episode_counts if metadata else {}
-    for report in seasons.values():
-        if not report.episodes_present:
+    seasons: Dict[int, SeasonReport] = {}
+    for season_number in sorted(season_episodes):
+        report = seasons[season_number] = SeasonReport(season=season_number)
+        episode_set = season_episodes[season_number]
+        if not episode_set:
             continue
-        episodes = normalize_episode_numbers(report.episodes_present)
+        episodes = sorted(episode_set)
         report.episodes_present = episodes
-        if episodes:
-            expected_max = episodes[-1]
-            metadata_count = episode_expectations.get(report.season)
-            if metadata_count and metadata_count > expected_max:
-                expected_max = metadata_count
-            report.missing_episodes = [num for num in range(1, expected_max + 1) if num not in episodes]
+        expected_max = episodes[-1]
+        metadata_count = episode_expectations.get(season_number)
+        if metadata_count and metadata_count > expected_max:
+            expected_max = metadata_count
+        report.missing_episodes = sorted(set(range(1, expected_max + 1)).difference(episode_set))
     present_seasons = {num for num in seasons if num > 0}
     max_local = max(present_seasons) if present_seasons else 0
     metadata_total = metadata.total_seasons if metadata and metadata.total_seasons else None
     max_expected = metadata_total if metadata_total and metadata_total > max_local else max_local
-    missing_seasons: List[int] = []
-    if max_expected:
-        for season_number in range(1, max_expected + 1):
-            if season_number not in present_seasons:
-                missing_seasons.append(season_number)
+    missing_seasons = sorted(set(range(1, max_expected + 1)).difference(present_seasons))
     return ShowReport(
         name=show_name,
         path=show_path,
@@ -837,13 +965,22 @@ def analyze_show(show_name: str, show_path: str, metadata: Optional[CSFDShowCand
     )
 
 
+def analyze_show(
+    show_name: str,
+    show_path: str,
+    metadata: Optional[CSFDShowCandidate] = None,
+    deep: bool = False,
+) -> ShowReport:
+    season_episodes = scan_show_episodes(show_path, deep=deep)
+    return build_show_report(show_name, show_path, season_episodes, metadata=metadata)
+
+
 def format_episode(tag_season: int, episode: int) -> str:
     return f"S{tag_season:02d}E{episode:02d}"
 
 
 def display_progress(show_idx: int, total: int, report: ShowReport) -> None:
-    header = f"[{show_idx}/{total}] {report.name}"
-    print(header)
+    lines = [f"[{show_idx}/{total}] {report.name}"]
     if report.csfd:
         origins = ", ".join(report.csfd.origins) if report.csfd.origins else "Unknown origin"
         original = report.csfd.original_title or "Unknown original title"
@@ -852,58 +989,62 @@ def display_progress(show_idx: int, total: int, report: ShowReport) -> None:
             if report.csfd.total_seasons
             else ""
         )
-        print(
+        lines.append(
             f"  CSFD match: {report.csfd.title} ({report.csfd.year or '?'}) | {origins} | Original: {original}{seasons_total}"
         )
     if not report.seasons:
-        print("  No seasons detected (no season folders or SxxEyy markers).")
-        return
-    for season_number in sorted(report.seasons):
-        season_report = report.seasons[season_number]
-        missing = season_report.missing_episodes
-        if not season_report.episodes_present:
-            print(f"  Season {season_number:02d}: no episode markers found")
-            continue
-        if missing:
-            formatted_missing = ", ".join(format_episode(season_number, ep) for ep in missing)
-            print(f"  Season {season_number:02d}: missing {formatted_missing}")
-        else:
-            print(f"  Season {season_number:02d}: complete (1-{season_report.episodes_present[-1]:02d})")
-    if report.missing_seasons:
-        formatted_seasons = ", ".join(f"S{season:02d}" for season in report.missing_seasons)
-        print(f"  Missing full seasons: {formatted_seasons}")
+        lines.append("  No seasons detected (no season folders or SxxEyy markers).")
+    else:
+        for season_number, season_report in report.seasons.items():
+            missing = season_report.missing_episodes
+            if not season_report.episodes_present:
+                lines.append(f"  Season {season_number:02d}: no episode markers found")
+                continue
+            if missing:
+                formatted_missing = ", ".join(format_episode(season_number, ep) for ep in missing)
+                lines.append(f"  Season {season_number:02d}: missing {formatted_missing}")
+            else:
+                lines.append(f"  Season {season_number:02d}: complete (1-{season_report.episodes_present[-1]:02d})")
+        if report.missing_seasons:
+            formatted_seasons = ", ".join(f"S{season:02d}" for season in report.missing_seasons)
+            lines.append(f"  Missing full seasons: {formatted_seasons}")
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 
-def summarize_results(reports: Sequence[ShowReport], heading: str = "Missing episodes summary") -> None:
-    print(f"\n{heading}:")
+def summarize_results(summaries: Sequence[ShowSummary], heading: str = "Missing episodes summary") -> None:
+    lines = ["", f"{heading}:"]
     any_missing = False
-    for report in reports:
-        missing = report.missing_summary()
-        has_missing = bool(missing or report.missing_seasons)
+    for summary in summaries:
+        missing = summary.missing_episodes
+        has_missing = bool(missing or summary.missing_seasons)
         if not has_missing:
             continue
         any_missing = True
-        print(f"- {report.name}")
-        if report.missing_seasons:
-            formatted_seasons = ", ".join(f"S{season:02d}" for season in report.missing_seasons)
-            print(f"    Missing full seasons: {formatted_seasons}")
+        lines.append(f"- {summary.name}")
+        if summary.missing_seasons:
+            formatted_seasons = ", ".join(f"S{season:02d}" for season in summary.missing_seasons)
+            lines.append(f"    Missing full seasons: {formatted_seasons}")
         for season, episodes in missing:
             formatted = ", ".join(format_episode(season, ep) for ep in episodes)
-            print(f"    Season {season:02d}: {formatted}")
+            lines.append(f"    Season {season:02d}: {formatted}")
     if not any_missing:
-        print("All processed seasons appear complete (no gaps detected).")
+        lines.append("All processed seasons appear complete (no gaps detected).")
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 
-def print_progress_summary(reports: Sequence[ShowReport], processed: int, total: int) -> None:
-    if not reports or processed >= total:
+def print_progress_summary(summaries: Sequence[ShowSummary], processed: int, total: int) -> None:
+    if not summaries or processed >= total:
         return
     heading = f"Progress summary ({processed}/{total} shows)"
-    summarize_results(reports, heading=heading)
+    summarize_results(summaries, heading=heading)
 
 
 def build_csfd_lookup(args: argparse.Namespace) -> Optional[CSFDLookup]:
     if args.no_csfd:
         return None
+    configure_show_detail_cache(None if args.no_cache else args.cache_dir)
     return CSFDLookup(max_results=args.csfd_max_results)
 
 
@@ -922,6 +1063,21 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Disable CSFD lookups and rely only on local folder names.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for the persistent CSFD metadata cache (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent CSFD metadata cache.",
+    )
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Walk every nested folder instead of only season-like folders below the second level.",
+    )
     args = parser.parse_args(argv)
     if args.csfd_max_results <= 0:
         parser.error("--csfd-max-results must be a positive integer")
@@ -947,21 +1103,28 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             return 1
         shows_to_process = [selected]
     else:
-        shows_to_process = shows
-    reports: List[ShowReport] = []
+        shows_to_process = [(name, path) for name, _, path in shows]
+    summaries: List[ShowSummary] = []
     total = len(shows_to_process)
+    # Directory scans run ahead in worker threads while the main thread handles
+    # the (possibly interactive) CSFD resolution and prints reports in order.
+    scan_pool = ThreadPoolExecutor(max_workers=min(total, MAX_SCAN_WORKERS))
+    scans = deque(scan_pool.submit(scan_show_episodes, show_path, args.deep) for _, show_path in shows_to_process)
     try:
         for idx, (show_name, show_path) in enumerate(shows_to_process, start=1):
             csfd_metadata = csfd_lookup.resolve(show_name) if csfd_lookup else None
-            report = analyze_show(show_name, show_path, metadata=csfd_metadata)
+            season_episodes = scans.popleft().result()
+            report = build_show_report(show_name, show_path, season_episodes, metadata=csfd_metadata)
             display_progress(idx, total, report)
-            reports.append(report)
-            print_progress_summary(reports, idx, total)
+            summaries.append(report.summary())
+            print_progress_summary(summaries, idx, total)
     except KeyboardInterrupt:
         print("\nInterrupted by user; displaying collected results so far...")
     finally:
-        if reports:
-            summarize_results(reports)
+        scan_pool.shutdown(wait=False, cancel_futures=True)
+        if summaries:
+            summarize_results(summaries)
+        configure_show_detail_cache(None)
     return 0
 
 
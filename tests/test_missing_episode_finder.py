@@ -1,15 +1,20 @@
 import os
 import tempfile
+from typing import Optional
 from unittest.mock import patch
 
 from missing_episode_finder import (
     CSFDLookup,
     CSFDShowCandidate,
+    configure_show_detail_cache,
     fetch_csfd_show_detail,
     analyze_show,
     derive_show_search_query,
+    extract_season_hint,
+    filter_shows,
     parse_csfd_show_detail,
     format_csfd_display_name,
+    is_video_file,
 )
 
 
@@ -54,6 +59,7 @@ def test_analyze_show_detects_whole_missing_seasons() -> None:
         _touch(os.path.join(season_three, "Return S03E01.mkv"))
         report = analyze_show("Gap Show", show_dir)
         assert report.missing_seasons == [2]
+        assert list(report.seasons) == [1, 3]
 
 
 def test_analyze_show_uses_metadata_episode_counts() -> None:
@@ -75,6 +81,30 @@ def test_analyze_show_uses_metadata_episode_counts() -> None:
         assert report.seasons[2].missing_episodes == [3, 4]
 
 
+def test_analyze_show_prunes_deep_non_season_folders_unless_deep() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        show_dir = os.path.join(tmpdir, "Show")
+        _touch(os.path.join(show_dir, "Season 1", "Disc 1", "Show.S01E01.mkv"))
+        _touch(os.path.join(show_dir, "Season 1", "Disc 1", "Extras", "Show.S01E02.mkv"))
+        _touch(os.path.join(show_dir, "Season 1", "Disc 1", "Season 2", "Show.S02E01.mkv"))
+        pruned = analyze_show("Show", show_dir)
+        assert pruned.seasons[1].episodes_present == [1]
+        assert pruned.seasons[2].episodes_present == [1]
+        full = analyze_show("Show", show_dir, deep=True)
+        assert full.seasons[1].episodes_present == [1, 2]
+
+
+def test_extract_season_hint_inherits_parent_folder() -> None:
+    assert extract_season_hint(("Season 02", "Disc 1")) == 2
+    assert extract_season_hint(("Season 02", "Specials")) == 0
+    assert extract_season_hint(("Extras",)) is None
+
+
+def test_extract_season_hint_ignores_year_like_numbers() -> None:
+    assert extract_season_hint(("Series 2005",)) is None
+    assert extract_season_hint(("Season 12",)) == 12
+
+
 def test_parse_csfd_show_detail_extracts_episode_counts() -> None:
     html = """
     <div class="film-episodes-list">
@@ -149,6 +179,90 @@ def test_fetch_csfd_show_detail_handles_paginated_seasons() -> None:
     assert mock_download.call_count == 2
 
 
+def test_fetch_csfd_show_detail_reuses_disk_cache_across_runs() -> None:
+    html = """
+    <div class="film-episodes-list">
+        <ul>
+            <li>
+                <h3 class="film-title">
+                    <a href="/film/77-cached/serie-1/" class="film-title-name">Série 1</a>
+                    <span class="film-title-info"><span class="info">(2001)</span> - 8 epizod</span>
+                </h3>
+            </li>
+        </ul>
+    </div>
+    """
+    url = "https://www.csfd.cz/film/77-cached/prehled/"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            configure_show_detail_cache(tmpdir)
+            with patch("missing_episode_finder._download_csfd_html", return_value=html) as mock_download:
+                first = fetch_csfd_show_detail(url)
+            configure_show_detail_cache(tmpdir)
+            with patch("missing_episode_finder._download_csfd_html", return_value=html) as mock_again:
+                second = fetch_csfd_show_detail(url)
+        finally:
+            configure_show_detail_cache(None)
+    assert mock_download.call_count == 1
+    assert mock_again.call_count == 0
+    assert first["season_episode_counts"] == second["season_episode_counts"] == {1: 8}
+
+
+def test_fetch_csfd_show_detail_does_not_persist_failed_downloads() -> None:
+    page_one = """
+    <div class="box-header"><h3>Série (2)</h3></div>
+    <div class="film-episodes-list">
+        <ul>
+            <li>
+                <h3 class="film-title">
+                    <a href="/film/88-flaky/serie-1/" class="film-title-name">Série 1</a>
+                    <span class="film-title-info"><span class="info">(2001)</span> - 8 epizod</span>
+                </h3>
+            </li>
+        </ul>
+    </div>
+    """
+    show_url = "https://www.csfd.cz/film/88-flaky/prehled/"
+    season_url = "https://www.csfd.cz/film/88-flaky/99-serie-1/"
+
+    def offline(url: str) -> None:
+        return None
+
+    def second_page_fails(url: str) -> Optional[str]:
+        return None if "seriePage=2" in url else page_one
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            configure_show_detail_cache(tmpdir)
+            with patch("missing_episode_finder._download_csfd_html", side_effect=offline):
+                assert fetch_csfd_show_detail(show_url) == {}
+            configure_show_detail_cache(tmpdir)
+            with patch("missing_episode_finder._download_csfd_html", side_effect=second_page_fails):
+                partial = fetch_csfd_show_detail(show_url)
+            assert partial["season_episode_counts"] == {1: 8}
+            configure_show_detail_cache(tmpdir)
+            with patch("missing_episode_finder._download_csfd_html", return_value="") as mock_download:
+                fetch_csfd_show_detail(show_url)
+                assert fetch_csfd_show_detail(season_url) == {}
+        finally:
+            configure_show_detail_cache(None)
+    assert mock_download.call_count == 2
+
+
+def test_is_video_file_matches_suffix_case_insensitively() -> None:
+    assert is_video_file("Show.S01E01.MkV")
+    assert is_video_file("episode.mp4")
+    assert not is_video_file("episode.nfo")
+    assert not is_video_file(".mkv")
+    assert not is_video_file("noextension")
+
+
+def test_filter_shows_matches_casefolded_names() -> None:
+    shows = [("Große Freiheit", "Große Freiheit".casefold(), "/tv/a"), ("Kancl", "kancl", "/tv/b")]
+    assert filter_shows(shows, "GROSSE") == [("Große Freiheit", "/tv/a")]
+    assert filter_shows(shows, "") == [("Große Freiheit", "/tv/a"), ("Kancl", "/tv/b")]
+
+
 def test_derive_show_search_query_strips_years_and_symbols() -> None:
     assert derive_show_search_query("Kancl (2005) Season_04") == "Kancl Season 04"
 
@@ -1,12 +1,38 @@
+import gzip
+import argparse
 import os
+import subprocess
 import tempfile
+import urllib.error
+import threading
+import zlib
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
 
 from title_lookup_service import (
+    HTTPSession,
+    configure_caches,
+    derive_search_query,
+    enrich_csfd_results,
+    fetch_csfd_detail,
+    fetch_csfd_results,
+    get_media_duration,
+    PersistentCache,
+    ResponseDecoder,
+    _CurrentNames,
+    _probe_media_duration,
+    SearchTUI,
     find_year_hint,
     format_media_name,
     parse_runtime,
+    scan_runtime,
     guess_search_query,
-    remap_path,
+    is_video_file,
+    iter_video_files,
+    parse_csfd_search_chunks,
+    parse_csfd_search_results,
+    process_library_path,
     rename_media_paths,
     sanitize_component,
 )
@@ -24,17 +50,38 @@ def test_find_year_hint_prefers_first_match() -> None:
     assert find_year_hint("Title 2001", "Other 1999") == 2001
 
 
+def test_is_video_file_matches_splitext_rules() -> None:
+    assert is_video_file("/media/Movie.2001.MKV")
+    assert is_video_file("relative/clip.ts")
+    assert not is_video_file("/media/.mkv")
+    assert not is_video_file("/media/..mp4")
+    assert not is_video_file("/media/movie.mkv.part")
+    assert not is_video_file("/media.mkv/readme")
+
+
 def test_guess_search_query_uses_directory_fallback() -> None:
     path = os.path.join("/tmp", "Some Title (2010)", "1080p.mkv")
     assert guess_search_query(path) == "Some Title"
 
 
-def test_remap_path_prefers_longest_match() -> None:
-    mapping = {
-        "/a/b": "/a/c",
-        "/a/b/d": "/a/c/e",
-    }
-    assert remap_path("/a/b/d/file.mkv", mapping) == "/a/c/e/file.mkv"
+def test_derive_search_query_clean_names_match_full_pipeline() -> None:
+    assert derive_search_query("Pelíšky") == "Pelíšky"
+    assert derive_search_query("Kancl 2") == "Kancl 2"
+    assert derive_search_query("Matrix HD") == "Matrix"
+    assert derive_search_query("Matrix 1999") == "Matrix"
+    assert derive_search_query("Matrix  Reloaded") == "Matrix Reloaded"
+
+
+def test_current_names_sanitises_each_name_once() -> None:
+    ctx = {"file_path": "/lib/Old Name (1999)/Movie: Title.mkv", "display_name": "Shown"}
+    with patch("title_lookup_service.sanitize_component", side_effect=lambda text: text.replace(":", " ")) as mock_sanitize:
+        names = _CurrentNames(ctx)
+        assert names.include("Movie  Title")
+        assert mock_sanitize.call_count == 1
+        assert not names.include("Other")
+        assert names.include("Old Name (1999)")
+        assert names.include("Shown")
+        assert mock_sanitize.call_count == 3
 
 
 def test_parse_runtime_extracts_minutes() -> None:
@@ -42,6 +89,170 @@ def test_parse_runtime_extracts_minutes() -> None:
     assert parse_runtime(html) == 142
 
 
+def test_scan_runtime_matches_across_chunks_and_stops_early() -> None:
+    consumed = []
+
+    def chunks():
+        for piece in ["<div class='origin'>USA, 2008, 1", "52 mi", "n</div>", "<p>90 min</p>"]:
+            consumed.append(piece)
+            yield piece
+
+    assert scan_runtime(chunks()) == 152
+    assert len(consumed) == 3
+    assert scan_runtime(["<div>no runtime</div>", "<p>here</p>"]) is None
+
+
+def test_parse_csfd_search_results_skips_page_head() -> None:
+    html = """
+    <html><head><script>var x = "<span class='info'>1999</span>";</script></head>
+    <body><nav><span class="info">(2005)</span></nav>
+    <a href="/film/1-prvni/" class="film-title-name">Prvn&iacute; film</a>
+    <span class="info">(2001)</span>
+    <a href="/film/2-druhy/" class="film-title-name">Druh&yacute;</a>
+    <span class="info">(1998)</span>
+    </body></html>
+    """
+    results = parse_csfd_search_results(html, 5)
+    assert results == [
+        {"title": "První film", "year": 2001, "url": "https://www.csfd.cz/film/1-prvni/"},
+        {"title": "Druhý", "year": 1998, "url": "https://www.csfd.cz/film/2-druhy/"},
+    ]
+    assert parse_csfd_search_results("<html><body>Nic</body></html>", 5) == []
+    # Result markers inside comments and scripts are not real anchors.
+    html = (
+        "<html><head><script>var s=\"<a class='film-title-name'>JS</a>\";</script></head>"
+        '<body><!-- <a class="film-title-name" href="/film/9-old/">Old</a> -->'
+        '<a href="/film/1-prvni/" class="film-title-name">Prvni</a><span class="info">(2001)</span>'
+    )
+    assert parse_csfd_search_results(html, 5) == [
+        {"title": "Prvni", "year": 2001, "url": "https://www.csfd.cz/film/1-prvni/"}
+    ]
+
+
+def test_parse_csfd_search_chunks_stops_once_results_are_final() -> None:
+    def chunks():
+        yield '<html><head><title>Hledat</title></head><body><a href="/film/1-a/" class="film'
+        yield '-title-name">A</a><span class="info">(20'
+        yield '01)</span><a href="/film/2-b/" class="film-title-name">B</a>'
+        raise AssertionError("read past the last needed result")
+
+    assert parse_csfd_search_chunks(chunks(), 1) == [
+        {"title": "A", "year": 2001, "url": "https://www.csfd.cz/film/1-a/"}
+    ]
+
+
+def test_fetch_csfd_results_caches_pages_but_not_failures() -> None:
+    page = '<a href="/film/7-cache/" class="film-title-name">Cache</a><span class="info">(2003)</span>'
+    with patch(
+        "title_lookup_service.CSFD_SESSION.iter_text",
+        side_effect=[urllib.error.URLError("down"), (part for part in [page])],
+    ) as mock_get:
+        assert fetch_csfd_results("cache test query", 5) == []
+        first = fetch_csfd_results("cache test query", 5)
+        first[0]["duration_minutes"] = 99
+        second = fetch_csfd_results("cache test query", 5)
+    assert mock_get.call_count == 2
+    assert second == [{"title": "Cache", "year": 2003, "url": "https://www.csfd.cz/film/7-cache/"}]
+
+
+def test_enrich_csfd_results_keeps_result_order() -> None:
+    results = [{"title": f"T{idx}", "url": f"/film/{idx}/"} for idx in range(5)]
+
+    def fake_detail(url: str) -> dict:
+        idx = int(url.strip("/").split("/")[-1])
+        return {"duration_minutes": 90 + idx} if idx % 2 == 0 else {}
+
+    with patch("title_lookup_service.fetch_csfd_detail", side_effect=fake_detail):
+        enriched = enrich_csfd_results(results)
+    assert [item["duration_minutes"] for item in enriched] == [90, None, 92, None, 94]
+    assert all(new is old for new, old in zip(enriched, results))
+
+
+def test_search_tui_fills_in_details_as_they_finish() -> None:
+    done, failed, running = Future(), Future(), Future()
+    done.set_result({"duration_minutes": 118})
+    failed.set_exception(RuntimeError("boom"))
+    results = [{"title": f"T{idx}", "duration_minutes": None} for idx in range(3)]
+    tui = SearchTUI("query", results, details=[done, failed, running])
+    assert tui._collect_details()
+    assert [item["duration_minutes"] for item in tui.results] == [118, None, None]
+    assert not tui._collect_details()
+    assert list(tui.pending) == [2]
+    running.set_result({"duration_minutes": 95})
+    tui._collect_details()
+    assert tui.results[2]["duration_minutes"] == 95
+    assert not tui.pending
+
+
+def test_fetch_csfd_detail_reuses_disk_cache_across_runs() -> None:
+    page = "<div class='origin'>USA, 2008, 152 min</div>"
+    url = "https://www.csfd.cz/film/223734-temny-rytir/prehled/"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            configure_caches(tmpdir)
+            with patch("title_lookup_service.CSFD_SESSION.iter_text", return_value=(part for part in [page])) as mock_get:
+                first = fetch_csfd_detail(url)
+                relative = fetch_csfd_detail("/film/223734-temny-rytir/prehled/")
+            configure_caches(tmpdir)
+            with patch("title_lookup_service.CSFD_SESSION.iter_text", return_value=(part for part in [page])) as mock_again:
+                second = fetch_csfd_detail(url)
+        finally:
+            configure_caches(None)
+    assert mock_get.call_count == 1
+    assert mock_again.call_count == 0
+    assert first == second == relative == {"duration_minutes": 152}
+
+
+def test_get_media_duration_probes_each_file_version_once() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        media = os.path.join(tmpdir, "movie.mkv")
+        with open(media, "wb") as handle:
+            handle.write(b"v1")
+        try:
+            configure_caches(tmpdir)
+            with patch.dict(os.environ, {"FFPROBE_PATH": "ffprobe"}), patch(
+                "title_lookup_service._probe_media_duration", return_value=95
+            ) as mock_probe:
+                assert get_media_duration(media) == 95
+                assert get_media_duration(media) == 95
+                configure_caches(tmpdir)
+                assert get_media_duration(media) == 95
+                assert mock_probe.call_count == 1
+                with open(media, "ab") as handle:
+                    handle.write(b"v2")
+                assert get_media_duration(media) == 95
+                assert mock_probe.call_count == 2
+        finally:
+            configure_caches(None)
+
+
+def test_probe_media_duration_parses_ffprobe_bytes() -> None:
+    output = b'{"streams": [{"duration": "5400.2"}, {"duration": "N/A"}], "format": {"duration": "5412.9"}}'
+    done = subprocess.CompletedProcess([], 0, stdout=output)
+    with patch("title_lookup_service.subprocess.run", return_value=done):
+        assert _probe_media_duration("ffprobe", "movie.mkv") == 90
+    garbage = subprocess.CompletedProcess([], 0, stdout=b"\xff not json")
+    with patch("title_lookup_service.subprocess.run", return_value=garbage):
+        assert _probe_media_duration("ffprobe", "movie.mkv") is None
+
+
+def test_iter_video_files_yields_sorted_top_down() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for rel in ("b.mkv", "a.mp4", "notes.txt", "Z/inner.avi", "A/deep/x.mkv", "A/y.ts"):
+            path = os.path.join(tmpdir, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb"):
+                pass
+        found = iter_video_files(tmpdir)
+        assert next(found) == os.path.join(tmpdir, "a.mp4")
+        assert [os.path.relpath(path, tmpdir) for path in found] == [
+            "b.mkv",
+            os.path.join("A", "y.ts"),
+            os.path.join("A", "deep", "x.mkv"),
+            os.path.join("Z", "inner.avi"),
+        ]
+
+
 def test_rename_media_paths_updates_file_and_directory() -> None:
     with tempfile.TemporaryDirectory() as tmpdir:
         root = os.path.join(tmpdir, "Library")
@@ -75,3 +286,166 @@ def test_rename_media_paths_creates_folder_for_root_level_file() -> None:
         assert new_path == expected_file
         assert os.path.exists(expected_file)
         assert os.path.isdir(expected_dir)
+
+
+def test_persistent_cache_round_trip_and_expiry() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cache", "entries")
+        cache = PersistentCache(path)
+        cache.set("hit", {"duration_minutes": 90})
+        cache.set("miss", {})
+        cache.close()
+        # A late call from a worker thread must not reopen a closed cache.
+        cache.set("late", {"duration_minutes": 1})
+        assert cache.get("hit") is None
+        reopened = PersistentCache(path, negative_ttl=-1)
+        assert reopened.get("hit") == {"duration_minutes": 90}
+        assert reopened.get("miss") is None
+        assert reopened.get("absent") is None
+        assert reopened.get("late") is None
+        reopened.close()
+
+
+def test_http_session_reuses_connections_and_follows_redirects() -> None:
+    peers = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            peers.append(self.client_address)
+            if self.path == "/old":
+                self.send_response(301)
+                self.send_header("Location", "/new")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    session = HTTPSession()
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        assert session.get_text(f"{base}/old", {}) == "/new"
+        assert session.get_text(f"{base}/again", {}) == "/again"
+        chunks = session.iter_text(f"{base}/early", {})
+        assert next(chunks) == "/early"
+        chunks.close()
+        assert session.get_text(f"{base}/last", {}) == "/last"
+    finally:
+        session.close()
+        server.shutdown()
+        server.server_close()
+    assert len(peers) == 5
+    assert len(set(peers)) == 1
+
+
+def test_response_decoder_handles_gzip_zlib_and_raw_deflate() -> None:
+    text = "Série 1 - 13 epizod"
+    raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw_payload = raw_deflate.compress(text.encode()) + raw_deflate.flush()
+
+    def decode(raw: bytes, encoding: str, split: int = 0) -> str:
+        decoder = ResponseDecoder(encoding)
+        chunks = [raw[:split], raw[split:]] if split else [raw]
+        return "".join(decoder.feed(chunk) for chunk in chunks) + decoder.finish()
+
+    assert decode(gzip.compress(text.encode()), "gzip") == text
+    assert decode(gzip.compress(text.encode()), "gzip", split=15) == text
+    assert decode(zlib.compress(text.encode()), "deflate") == text
+    assert decode(raw_payload, "deflate") == text
+    assert decode(text.encode(), "") == text
+    # A multi-byte character split across reads is still decoded whole.
+    assert decode(text.encode(), "", split=2) == text
+
+
+def test_process_library_path_prefetches_lookups_in_auto_mode() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ("Alpha", "Beta"):
+            os.makedirs(os.path.join(tmpdir, name))
+            with open(os.path.join(tmpdir, name, f"{name}.mkv"), "wb"):
+                pass
+        os.makedirs(os.path.join(tmpdir, "Alpha", "Extra"))
+        with open(os.path.join(tmpdir, "Alpha", "Extra", "Gamma.mkv"), "wb"):
+            pass
+        args = argparse.Namespace(
+            path=tmpdir, auto_choice=1, max_results=5, year=None, auto_skip_matches=False
+        )
+
+        def fake_search(query: str, limit: int) -> list:
+            return [{"title": f"{query} Movie", "year": 2001, "url": f"/film/{query}/"}]
+
+        with patch("title_lookup_service.fetch_csfd_results", side_effect=fake_search) as mock_search, patch(
+            "title_lookup_service.get_media_duration", return_value=None
+        ), patch("title_lookup_service.supports_curses", return_value=False):
+            assert process_library_path(args) == 0
+        assert sorted(call.args[0] for call in mock_search.call_args_list) == ["Alpha", "Beta", "Gamma"]
+        assert os.path.exists(
+            os.path.join(tmpdir, "Alpha Movie (2001)", "Gamma Movie (2001)", "Gamma Movie (2001).mkv")
+        )
+        assert os.path.exists(os.path.join(tmpdir, "Alpha Movie (2001)", "Alpha Movie (2001).mkv"))
+        assert os.path.exists(os.path.join(tmpdir, "Beta Movie (2001)", "Beta Movie (2001).mkv"))
+
+
+def test_process_library_path_bounds_the_prefetch_window() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for idx in range(7):
+            with open(os.path.join(tmpdir, f"movie{idx}.mkv"), "wb"):
+                pass
+        args = argparse.Namespace(
+            path=tmpdir, auto_choice=1, max_results=5, year=None, auto_skip_matches=False
+        )
+        started = []
+        ahead = []
+
+        def fake_prefetch(file_path: str, limit: int) -> tuple:
+            started.append(file_path)
+            return "", []
+
+        def fake_process(file_path: str, root_path: str, args, progress=None, prefetched=None) -> tuple:
+            prefetched.result()
+            ahead.append(len(started) - progress["current_index"])
+            return "unchanged", file_path, None
+
+        with patch("title_lookup_service.PREFETCH_WINDOW", 2), patch(
+            "title_lookup_service.prefetch_lookup", side_effect=fake_prefetch
+        ), patch("title_lookup_service.process_media_file", side_effect=fake_process):
+            assert process_library_path(args) == 0
+    assert len(started) == 7
+    assert max(ahead) <= 1
+
+
+def test_process_library_path_follows_folder_renamed_to_freed_name() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for folder, name in (("First (2001)", "Alpha"), ("Second (2001)", "Beta")):
+            os.makedirs(os.path.join(tmpdir, folder))
+            with open(os.path.join(tmpdir, folder, f"{name}.mkv"), "wb"):
+                pass
+        os.makedirs(os.path.join(tmpdir, "Second (2001)", "Extra"))
+        with open(os.path.join(tmpdir, "Second (2001)", "Extra", "Gamma.mkv"), "wb"):
+            pass
+        args = argparse.Namespace(
+            path=tmpdir, auto_choice=1, max_results=5, year=None, auto_skip_matches=False
+        )
+        # Beta's folder takes the name Alpha's folder just gave up.
+        titles = {"Alpha": "Zed", "Beta": "First", "Gamma": "Gamma"}
+
+        def fake_search(query: str, limit: int) -> list:
+            return [{"title": titles[query], "year": 2001, "url": f"/film/{query}/"}]
+
+        with patch("title_lookup_service.fetch_csfd_results", side_effect=fake_search), patch(
+            "title_lookup_service.get_media_duration", return_value=None
+        ), patch("title_lookup_service.supports_curses", return_value=False):
+            assert process_library_path(args) == 0
+        assert os.path.exists(os.path.join(tmpdir, "Zed (2001)", "Zed (2001).mkv"))
+        assert os.path.exists(os.path.join(tmpdir, "First (2001)", "First (2001).mkv"))
+        assert os.path.exists(os.path.join(tmpdir, "First (2001)", "Gamma (2001)", "Gamma (2001).mkv"))
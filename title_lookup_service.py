@@ -4,33 +4,43 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import codecs
+import contextlib
 import curses
 import functools
-import gzip
+import http.client
 import json
 import os
 import random
 import re
+import shelve
 import shutil
 import subprocess
 import sys
 import textwrap
+import threading
+import time
+import types
 import urllib.error
 import urllib.parse
 import urllib.request
 import zlib
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from html.parser import HTMLParser
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 CSFD_SEARCH_URL = os.environ.get(
     "CSFD_SEARCH_URL",
     "https://www.csfd.cz/hledat/?q={query}",
 )
-USER_AGENTS = [
+USER_AGENTS = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
     "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
-]
+)
 BASE_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
     "Accept-Language": "cs-CZ,cs;q=0.9,sk;q=0.8,en;q=0.6",
@@ -43,20 +53,60 @@ BASE_HEADERS = {
     "Cookie": "csfd_session=start;accept-xframes=deny",
 }
 DEFAULT_MAX_RESULTS = 10
-NOISE_TOKENS = {
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "jellyfin-content-renamer",
+)
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+NEGATIVE_CACHE_TTL_SECONDS = 24 * 60 * 60
+DETAIL_CACHE_FILE = "csfd_details"
+DURATION_CACHE_FILE = "media_durations"
+HTTP_TIMEOUT_SECONDS = 10
+HTTP_MAX_REDIRECTS = 5
+HTTP_MAX_IDLE_PER_HOST = 8
+HTTP_READ_CHUNK_SIZE = 64 * 1024
+ZLIB_AUTO_HEADER_WBITS = 32 + zlib.MAX_WBITS
+MAX_DETAIL_FETCH_WORKERS = 8
+MAX_PREFETCH_WORKERS = 8
+# Files looked up ahead of the one being processed in --auto-choice runs.
+PREFETCH_WINDOW = 2 * MAX_PREFETCH_WORKERS
+# How often the search TUI wakes up to show detail lookups that finished in the background.
+DETAIL_POLL_MS = 100
+NOISE_TOKENS = frozenset({
     "hd", "uhd", "uhdtv", "hdr", "hdrip", "bdrip", "brrip", "webrip", "webdl",
     "dvdrip", "remastered", "fullhd", "bluray", "br", "hevc", "x264", "x265",
     "h264", "h265", "ac3", "dts", "aac", "dd5", "dd51", "multi", "cz", "sk",
     "en", "pl", "dab", "dabing", "dub", "titulky", "tit", "subs", "subtitles",
-}
-RESOLUTION_PATTERN = re.compile(r"(?i)\b(480|576|720|1080|1440|2160)p\b")
-YEAR_PATTERN = re.compile(r"(18[8-9][0-9]|19[0-9]{2}|20[0-4][0-9])")
-SEPARATORS = re.compile(r"[._-]+")
-NON_ALNUM = re.compile(r"[^0-9a-zA-ZáéěíóúůýščřžÁÉĚÍÓÚŮÝŠČŘŽ ]+")
-WHITESPACE = re.compile(r"\s+")
-INVALID_FILENAME_CHARS = re.compile(r'[\\/<>:"|?*]')
+})
+YEAR_PATTERN = re.compile(r"(18[8-9][0-9]|19[0-9]{2}|20[0-4][0-9])", re.ASCII)
+NOISE_TOKEN_PATTERN = re.compile(
+    "(?:"
+    + "|".join(re.escape(token) for token in sorted(NOISE_TOKENS, key=len, reverse=True))
+    + r"|(?:480|576|720|1080|1440|2160)p"
+    + r"|18[8-9][0-9]|19[0-9]{2}|20[0-4][0-9])"
+)
+BRACKET_PATTERN = re.compile(r"\([^)]*\)")
+QUERY_WORD_CHARS = "0-9a-zA-ZáéěíóúůýščřžÁÉĚÍÓÚŮÝŠČŘŽ"
+# One findall yields the query words: maximal runs of word characters (anything
+# else, including . _ -, separates them) that are not noise tokens. The
+# lookbehind stops a rejected token from matching again from its second letter.
+QUERY_TOKEN_PATTERN = re.compile(
+    f"(?<![{QUERY_WORD_CHARS}])(?!(?i:{NOISE_TOKEN_PATTERN.pattern})(?![{QUERY_WORD_CHARS}]))[{QUERY_WORD_CHARS}]+"
+)
+# Characters not allowed in file or folder names, mapped to spaces.
+INVALID_FILENAME_TABLE = str.maketrans(dict.fromkeys('\\/<>:"|?*', " "))
+# Names the query pipeline would return unchanged: single-spaced words with no noise tokens.
+CLEAN_QUERY_PATTERN = re.compile(
+    f"(?!(?i:{NOISE_TOKEN_PATTERN.pattern})(?: |\\Z))[{QUERY_WORD_CHARS}]+"
+    f"(?: (?!(?i:{NOISE_TOKEN_PATTERN.pattern})(?: |\\Z))[{QUERY_WORD_CHARS}]+)*"
+)
 RUNTIME_PATTERN = re.compile(r"(\d{1,3})\s*(?:min|min\.|minut|minuty|minutes)", re.IGNORECASE)
-VIDEO_EXTENSIONS = {
+# Text carried between streamed chunks so a runtime split across them still matches.
+RUNTIME_SCAN_OVERLAP = 64
+# Whole-word matches inside a class attribute, same as testing class.split().
+TITLE_CLASS_PATTERN = re.compile(r"(?<!\S)film-title-name(?!\S)")
+INFO_CLASS_PATTERN = re.compile(r"(?<!\S)info(?!\S)")
+VIDEO_EXTENSIONS = frozenset({
     ".mkv",
     ".mp4",
     ".avi",
@@ -67,7 +117,14 @@ VIDEO_EXTENSIONS = {
     ".mpeg",
     ".flv",
     ".iso",
-}
+})
+PATH_SEPARATORS = os.sep + (os.altsep or "")
+# Derived from VIDEO_EXTENSIONS so both stay in sync; stacked suffixes are stripped too.
+VIDEO_SUFFIX_PATTERN = re.compile(
+    r"(?i)(?:\.(?:"
+    + "|".join(re.escape(ext[1:]) for ext in sorted(VIDEO_EXTENSIONS, key=len, reverse=True))
+    + r"))+\Z"
+)
 
 FFPROBE_WARNING_SHOWN = False
 
@@ -80,12 +137,264 @@ class TUIError(Exception):
     """Raised when the interactive TUI cannot be displayed."""
 
 
+class _SearchComplete(Exception):
+    """Raised by MovieSearchParser to stop tokenizing once its results are final."""
+
+
+
+class PersistentCache:
+    """Thread-safe shelve store whose entries expire after a TTL."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = CACHE_TTL_SECONDS,
+        negative_ttl: float = NEGATIVE_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._db: Optional[shelve.Shelf] = None
+        self._disabled = False
+
+    def _open(self) -> Optional[shelve.Shelf]:
+        if self._db is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._db = shelve.open(self.path)
+            except Exception:  # noqa: BLE001 - a broken cache must never break lookups
+                self._disabled = True
+        return self._db
+
+    def get(self, key: str) -> Optional[object]:
+        with self._lock:
+            db = self._open()
+            if db is None:
+                return None
+            try:
+                entry = db.get(key)
+            except Exception:  # noqa: BLE001 - treat unreadable entries as misses
+                return None
+        if not entry:
+            return None
+        stored_at, value = entry
+        ttl = self.ttl if value else self.negative_ttl
+        if time.time() - stored_at > ttl:
+            return None
+        return value
+
+    def set(self, key: str, value: object) -> None:
+        with self._lock:
+            db = self._open()
+            if db is None:
+                return
+            try:
+                db[key] = (time.time(), value)
+            except Exception:  # noqa: BLE001 - caching is best effort
+                pass
+
+    def close(self) -> None:
+        # Worker threads may still hold this cache; later calls become no-ops
+        # instead of reopening a shelve nobody closes.
+        with self._lock:
+            self._disabled = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class HTTPSession:
+    """Keep-alive pool of http.client connections shared by all CSFD requests."""
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT_SECONDS, max_idle_per_host: int = HTTP_MAX_IDLE_PER_HOST) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get_text(self, url: str, headers: Dict[str, str]) -> str:
+        """Return the decoded body, inflating and decoding it chunk by chunk as it arrives."""
+        return "".join(self.iter_text(url, headers))
+
+    def iter_text(self, url: str, headers: Dict[str, str]) -> Iterator[str]:
+        """Yield the decoded body piecewise; closing the iterator early skips decoding the rest."""
+        try:
+            with self.open(url, headers) as response:
+                decoder = ResponseDecoder(response.headers.get("Content-Encoding", ""))
+                try:
+                    while True:
+                        chunk = response.read(HTTP_READ_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield decoder.feed(chunk)
+                    yield decoder.finish()
+                except GeneratorExit:
+                    # Read the remainder undecoded so the connection stays reusable.
+                    try:
+                        response.read()
+                    except (OSError, http.client.HTTPException):
+                        pass
+                    raise
+        except urllib.error.URLError:
+            raise
+        except (OSError, http.client.HTTPException) as exc:
+            raise urllib.error.URLError(exc) from exc
+
+    @contextlib.contextmanager
+    def open(self, url: str, headers: Dict[str, str]) -> Iterator[http.client.HTTPResponse]:
+        """GET ``url`` (following redirects) and yield the response with its body unread."""
+        for _ in range(HTTP_MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ("http", "https") or not parts.hostname:
+                raise urllib.error.URLError(f"unsupported URL: {url}")
+            if self._uses_proxy(scheme, parts.hostname):
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout) as response:
+                    yield response
+                return
+            key = (scheme, parts.netloc)
+            target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+            conn, response = self._request(key, target, headers)
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                self._finish(key, conn, response, drain=True)
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if response.status >= 400:
+                self._finish(key, conn, response, drain=True)
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            try:
+                yield response
+            finally:
+                self._finish(key, conn, response)
+            return
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def _request(
+        self, key: Tuple[str, str], target: str, headers: Dict[str, str]
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        conn = self._acquire(key)
+        reused = conn is not None
+        if conn is None:
+            conn = self._connect(key)
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            if not reused:
+                raise urllib.error.URLError(exc) from exc
+        # The server dropped an idle keep-alive socket; retry once on a fresh one.
+        conn = self._connect(key)
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            raise urllib.error.URLError(exc) from exc
+
+    def _connect(self, key: Tuple[str, str]) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _acquire(self, key: Tuple[str, str]) -> Optional[http.client.HTTPConnection]:
+        with self._lock:
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _finish(
+        self,
+        key: Tuple[str, str],
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+        drain: bool = False,
+    ) -> None:
+        if drain:
+            try:
+                response.read()
+            except (OSError, http.client.HTTPException):
+                pass
+        # A connection is only reusable once its response body was fully consumed.
+        if not response.isclosed() or response.will_close:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @staticmethod
+    def _uses_proxy(scheme: str, host: str) -> bool:
+        proxies = urllib.request.getproxies()
+        return scheme in proxies and not urllib.request.proxy_bypass(host)
+
+
+CSFD_SESSION = HTTPSession()
+atexit.register(CSFD_SESSION.close)
+
+
+class ResponseDecoder:
+    """Incremental gzip/deflate + UTF-8 decoder for HTTP response bodies."""
+
+    def __init__(self, encoding: str) -> None:
+        codec = encoding.lower()
+        self._inflater = None
+        self._started = False
+        self._broken = False
+        if "gzip" in codec or "deflate" in codec:
+            # wbits=47 auto-detects gzip vs zlib framing; raw deflate (sent by
+            # some servers for "deflate") is tried if the first chunk fails.
+            self._inflater = zlib.decompressobj(ZLIB_AUTO_HEADER_WBITS)
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    def feed(self, chunk: bytes) -> str:
+        if self._broken:
+            return ""
+        if self._inflater is not None:
+            chunk = self._inflate(chunk)
+        self._started = True
+        return self._text.decode(chunk)
+
+    def finish(self) -> str:
+        tail = b""
+        if self._inflater is not None:
+            tail = self._inflater.flush()
+        return self._text.decode(tail, final=True)
+
+    def _inflate(self, chunk: bytes) -> bytes:
+        try:
+            return self._inflater.decompress(chunk)
+        except zlib.error:
+            pass
+        if self._started:
+            # Corrupt mid-stream; keep what was already decoded, drop the rest.
+            self._inflater = None
+            self._broken = True
+            return b""
+        try:
+            self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._inflater.decompress(chunk)
+        except zlib.error:
+            # Mislabelled payload: treat it as plain bytes, like before.
+            self._inflater = None
+            return chunk
+
 
 def build_headers() -> dict:
-    headers = dict(BASE_HEADERS)
-    ua_override = os.environ.get("CSFD_USER_AGENT")
-    headers["User-Agent"] = ua_override or random.choice(USER_AGENTS)
-    return headers
+    # A fresh dict per call, since callers may adjust it (e.g. Accept-Encoding).
+    return {**BASE_HEADERS, "User-Agent": os.environ.get("CSFD_USER_AGENT") or random.choice(USER_AGENTS)}
 
 
 class MovieSearchParser(HTMLParser):
@@ -94,30 +403,41 @@ class MovieSearchParser(HTMLParser):
         self.limit = limit
         self.results: List[dict] = []
         self._current: Optional[dict] = None
+        self._title_parts: List[str] = []
         self._capture_title = False
         self._capture_year = False
         self._year_target: Optional[dict] = None
 
+    @property
+    def complete(self) -> bool:
+        # Years are only filled in when missing, so once the last slot holds a
+        # dated result no later markup can change the list.
+        return len(self.results) >= self.limit and (not self.results or self.results[-1]["year"] is not None)
+
     def handle_starttag(self, tag: str, attrs: list) -> None:  # noqa: D401
-        attr_map = dict(attrs)
-        class_names = attr_map.get("class", "")
-        class_set = {name for name in class_names.split() if name}
+        if tag != "a" and tag != "span":
+            return
+        class_names = ""
+        for name, value in attrs:
+            if name == "class":
+                class_names = value or ""
 
-        if tag == "a" and "film-title-name" in class_set:
+        if tag == "a" and TITLE_CLASS_PATTERN.search(class_names):
             if len(self.results) >= self.limit:
                 self._current = None
                 self._capture_title = False
                 return
-            href = attr_map.get("href", "")
+            href = dict(attrs).get("href", "")
             self._current = {
                 "title": "",
                 "year": None,
                 "url": urllib.parse.urljoin("https://www.csfd.cz", href),
             }
+            self._title_parts = []
             self._capture_title = True
             return
 
-        if tag == "span" and "info" in class_set:
+        if tag == "span" and INFO_CLASS_PATTERN.search(class_names):
             if self.results:
                 self._year_target = self.results[-1]
             if self._current is not None:
@@ -127,10 +447,12 @@ class MovieSearchParser(HTMLParser):
     def handle_endtag(self, tag: str) -> None:  # noqa: D401
         if tag == "a" and self._capture_title:
             self._capture_title = False
-            if self._current and self._current.get("title"):
-                self._current["title"] = self._current["title"].strip()
+            if self._current and self._title_parts:
+                self._current["title"] = "".join(self._title_parts).strip()
                 if self._current["title"] and len(self.results) < self.limit:
                     self.results.append(self._current)
+                    if self.complete:
+                        raise _SearchComplete()
             self._current = None
             self._year_target = None
         elif tag == "span" and self._capture_year:
@@ -139,7 +461,7 @@ class MovieSearchParser(HTMLParser):
 
     def handle_data(self, data: str) -> None:  # noqa: D401
         if self._capture_title and self._current is not None:
-            self._current["title"] += data
+            self._title_parts.append(data)
             return
         if self._capture_year and self._year_target is not None and not self._year_target.get("year"):
             match = YEAR_PATTERN.search(data)
@@ -147,71 +469,78 @@ class MovieSearchParser(HTMLParser):
                 self._year_target["year"] = int(match.group(0))
                 self._capture_year = False
                 self._year_target = None
+                if self.complete:
+                    raise _SearchComplete()
 
 
 def strip_extensions(filename: str) -> str:
-    stem = filename
-    while "." in stem:
-        base, ext = stem.rsplit(".", 1)
-        if ext.lower() in {"mkv", "mp4", "avi", "mov", "ts", "wmv", "mpg", "mpeg", "flv", "iso"}:
-            stem = base
-        else:
-            break
-    return stem
+    return VIDEO_SUFFIX_PATTERN.sub("", filename)
 
 
-def normalize_delimiters(text: str) -> str:
-    return SEPARATORS.sub(" ", text)
+def _drop_year_bracket(match: re.Match) -> str:
+    group = match.group(0)
+    return "" if YEAR_PATTERN.search(group) else group
 
 
 def remove_bracketed_years(text: str) -> str:
-    return re.sub(r"\([^)]*\)", lambda m: "" if YEAR_PATTERN.search(m.group(0) or "") else m.group(0), text)
-
-
-def remove_noise_tokens(tokens: Iterable[str]) -> List[str]:
-    cleaned: List[str] = []
-    for token in tokens:
-        lowered = token.lower()
-        if lowered in NOISE_TOKENS or RESOLUTION_PATTERN.fullmatch(token):
-            continue
-        if YEAR_PATTERN.fullmatch(token):
-            continue
-        cleaned.append(token)
-    return cleaned
+    return BRACKET_PATTERN.sub(_drop_year_bracket, text)
 
 
+@functools.lru_cache(maxsize=4096)
 def derive_search_query(filename: str, hint: Optional[str] = None) -> str:
     base = hint or filename
+    if CLEAN_QUERY_PATTERN.fullmatch(base):
+        return base
     base = strip_extensions(base)
     base = remove_bracketed_years(base)
-    base = normalize_delimiters(base)
-    base = NON_ALNUM.sub(" ", base)
-    tokens = [token for token in base.split() if token]
-    tokens = remove_noise_tokens(tokens)
-    cleaned = WHITESPACE.sub(" ", " ".join(tokens)).strip()
-    return cleaned
+    return " ".join(QUERY_TOKEN_PATTERN.findall(base))
 
 
 def fetch_csfd_results(query: str, limit: int) -> List[dict]:
     if not query:
         return []
-    url = CSFD_SEARCH_URL.format(query=urllib.parse.quote(query))
-    request = urllib.request.Request(url, headers=build_headers())
     try:
-        with urllib.request.urlopen(request, timeout=10) as response:
-            raw = response.read()
-            encoding = response.headers.get("Content-Encoding", "").lower()
-            if "gzip" in encoding:
-                payload = gzip.decompress(raw).decode("utf-8", errors="ignore")
-            elif "deflate" in encoding:
-                payload = zlib.decompress(raw).decode("utf-8", errors="ignore")
-            else:
-                payload = raw.decode("utf-8", errors="ignore")
+        cached = _search_csfd(query, limit)
     except urllib.error.URLError as exc:  # pragma: no cover
         print(f"CSFD lookup failed: {exc}", file=sys.stderr)
         return []
+    # Callers fill in runtimes and years on the dicts, so each gets its own copies.
+    return [dict(item) for item in cached]
+
+
+# Failures raise, so they are never cached.
+@functools.lru_cache(maxsize=256)
+def _search_csfd(query: str, limit: int) -> Tuple[dict, ...]:
+    url = CSFD_SEARCH_URL.format(query=urllib.parse.quote(query))
+    chunks = CSFD_SESSION.iter_text(url, build_headers())
+    try:
+        return tuple(parse_csfd_search_chunks(chunks, limit))
+    finally:
+        chunks.close()
+
+
+def parse_csfd_search_results(payload: str, limit: int) -> List[dict]:
+    return parse_csfd_search_chunks((payload,), limit)
+
+
+def parse_csfd_search_chunks(chunks: Iterable[str], limit: int) -> List[dict]:
+    """Like parse_csfd_search_results over the joined chunks, but stops once the results are final."""
     parser = MovieSearchParser(limit)
-    parser.feed(payload)
+    pending = ""
+    try:
+        for chunk in chunks:
+            pending += chunk
+            # Feed up to the last tag start only, so no text node is split across feeds.
+            cut = pending.rfind("<")
+            if cut <= 0:
+                continue
+            parser.feed(pending[:cut])
+            pending = pending[cut:]
+            if parser.complete:
+                return parser.results
+        parser.feed(pending)
+    except _SearchComplete:
+        pass
     return parser.results
 
 
@@ -248,48 +577,94 @@ def parse_runtime(html: str) -> Optional[int]:
     return value if value > 0 else None
 
 
-@functools.lru_cache(maxsize=256)
+def scan_runtime(chunks: Iterable[str]) -> Optional[int]:
+    """Like parse_runtime over the joined chunks, but stops at the first match."""
+    tail = ""
+    for chunk in chunks:
+        window = tail + chunk
+        match = RUNTIME_PATTERN.search(window)
+        if match:
+            return parse_runtime(match.group(0))
+        tail = window[-RUNTIME_SCAN_OVERLAP:]
+    return None
+
+
+_DETAIL_CACHE: Optional[PersistentCache] = None
+_DURATION_CACHE: Optional[PersistentCache] = None
+
+
+def configure_caches(cache_dir: Optional[str]) -> None:
+    global _DETAIL_CACHE, _DURATION_CACHE
+    for cache in (_DETAIL_CACHE, _DURATION_CACHE):
+        if cache is not None:
+            cache.close()
+    _DETAIL_CACHE = PersistentCache(os.path.join(cache_dir, DETAIL_CACHE_FILE)) if cache_dir else None
+    _DURATION_CACHE = PersistentCache(os.path.join(cache_dir, DURATION_CACHE_FILE)) if cache_dir else None
+    _fetch_csfd_detail_cached.cache_clear()
+    _cached_media_duration.cache_clear()
+
+
 def fetch_csfd_detail(url: str) -> Dict[str, Optional[int]]:
     if not url:
         return {}
-    absolute_url = urllib.parse.urljoin("https://www.csfd.cz", url)
-    request = urllib.request.Request(absolute_url, headers=build_headers())
+    # Canonicalise first so relative and absolute forms share one cache entry.
+    return _fetch_csfd_detail_cached(urllib.parse.urljoin("https://www.csfd.cz", url))
+
+
+@functools.lru_cache(maxsize=2048)
+def _fetch_csfd_detail_cached(absolute_url: str) -> Dict[str, Optional[int]]:
+    disk_cache = _DETAIL_CACHE
+    if disk_cache is not None:
+        cached = disk_cache.get(absolute_url)
+        if cached is not None:
+            return cached
+    chunks = CSFD_SESSION.iter_text(absolute_url, build_headers())
     try:
-        with urllib.request.urlopen(request, timeout=10) as response:
-            raw = response.read()
-            encoding = response.headers.get("Content-Encoding", "").lower()
-            try:
-                if "gzip" in encoding:
-                    payload = gzip.decompress(raw).decode("utf-8", errors="ignore")
-                elif "deflate" in encoding:
-                    payload = zlib.decompress(raw).decode("utf-8", errors="ignore")
-                else:
-                    payload = raw.decode("utf-8", errors="ignore")
-            except (OSError, zlib.error, UnicodeDecodeError):
-                return {}
+        duration = scan_runtime(chunks)
     except urllib.error.URLError:
+        # Transient failures are not written to disk.
         return {}
-    duration = parse_runtime(payload)
-    return {"duration_minutes": duration}
+    finally:
+        chunks.close()
+    detail = {"duration_minutes": duration}
+    if disk_cache is not None:
+        disk_cache.set(absolute_url, detail)
+    return detail
 
 
 def enrich_csfd_results(results: Sequence[dict]) -> List[dict]:
-    enriched: List[dict] = []
-    for item in results:
-        enriched_item = dict(item)
-        detail = fetch_csfd_detail(enriched_item.get("url", ""))
+    if not results:
+        return []
+    urls = [item.get("url", "") for item in results]
+    with ThreadPoolExecutor(max_workers=min(len(urls), MAX_DETAIL_FETCH_WORKERS)) as pool:
+        details = list(pool.map(fetch_csfd_detail, urls))
+    # Search results are built fresh per lookup, so they are filled in place.
+    for item, detail in zip(results, details):
         if detail:
-            enriched_item["duration_minutes"] = detail.get("duration_minutes")
+            item["duration_minutes"] = detail.get("duration_minutes")
         else:
-            enriched_item.setdefault("duration_minutes", None)
-        enriched.append(enriched_item)
-    return enriched
+            item.setdefault("duration_minutes", None)
+    return list(results)
 
 
 def get_media_duration(file_path: str) -> Optional[int]:
-    global FFPROBE_WARNING_SHOWN
-    if not os.path.exists(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
         return None
+    # Keyed on size and mtime so a replaced or re-encoded file is probed again.
+    return _cached_media_duration(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_media_duration(abs_path: str, size: int, mtime_ns: int) -> Optional[int]:
+    global FFPROBE_WARNING_SHOWN
+    disk_cache = _DURATION_CACHE
+    cache_key = f"{abs_path}\0{size}\0{mtime_ns}"
+    if disk_cache is not None:
+        cached = disk_cache.get(cache_key)
+        if cached is not None:
+            return cached.get("duration_minutes")
     ffprobe = os.environ.get("FFPROBE_PATH") or shutil.which("ffprobe")
     if not ffprobe:
         if not FFPROBE_WARNING_SHOWN:
@@ -299,6 +674,13 @@ def get_media_duration(file_path: str) -> Optional[int]:
             )
             FFPROBE_WARNING_SHOWN = True
         return None
+    minutes = _probe_media_duration(ffprobe, abs_path)
+    if disk_cache is not None:
+        disk_cache.set(cache_key, {"duration_minutes": minutes})
+    return minutes
+
+
+def _probe_media_duration(ffprobe: str, file_path: str) -> Optional[int]:
     cmd = [
         ffprobe,
         "-v",
@@ -310,14 +692,14 @@ def get_media_duration(file_path: str) -> Optional[int]:
         file_path,
     ]
     try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
     except (OSError, ValueError):
         return None
     if result.returncode != 0:
         return None
     try:
         data = json.loads(result.stdout)
-    except json.JSONDecodeError:
+    except ValueError:
         return None
 
     def _parse_duration(value: object) -> Optional[float]:
@@ -393,10 +775,18 @@ def select_result_simple(
 
 
 class SearchTUI:
-    def __init__(self, query: str, results: Sequence[dict], context: Optional[dict] = None):
+    def __init__(
+        self,
+        query: str,
+        results: Sequence[dict],
+        context: Optional[dict] = None,
+        details: Optional[Sequence[Future]] = None,
+    ):
         self.query = query
         self.results = list(results)
         self.context = context or {}
+        # Detail lookups still in flight, keyed by result index; filled in as they finish.
+        self.pending: Dict[int, Future] = dict(enumerate(details or ()))
         self.suggest_skip = bool(self.context.get("suggest_skip"))
         self.selected = -1 if self.suggest_skip else 0
         self.top = 0
@@ -416,19 +806,28 @@ class SearchTUI:
             curses.start_color()
             curses.use_default_colors()
         self._init_colors()
+        redraw = True
         while True:
+            if self._collect_details():
+                redraw = True
+            stdscr.timeout(DETAIL_POLL_MS if self.pending else -1)
             height, width = stdscr.getmaxyx()
-            stdscr.erase()
-            if height < 12 or width < 60:
-                msg = "Terminal too small. Resize or press q to abort."
-                self._addstr(stdscr, max(0, height // 2), max(0, (width - len(msg)) // 2), msg, curses.A_BOLD)
-                key = stdscr.getch()
+            too_small = height < 12 or width < 60
+            if redraw:
+                stdscr.erase()
+                if too_small:
+                    msg = "Terminal too small. Resize or press q to abort."
+                    self._addstr(stdscr, max(0, height // 2), max(0, (width - len(msg)) // 2), msg, curses.A_BOLD, width)
+                else:
+                    self._draw(stdscr, height, width)
+            key = stdscr.getch()
+            # A poll that timed out leaves the frame as it was unless a lookup lands.
+            redraw = key != -1
+            if too_small:
                 if key in (ord("q"), ord("Q"), 27):
                     self.outcome = ("abort", None)
                     break
                 continue
-            self._draw(stdscr, height, width)
-            key = stdscr.getch()
             if key in (curses.KEY_UP, ord("k")):
                 self._move_selection(-1)
             elif key in (curses.KEY_DOWN, ord("j")):
@@ -463,6 +862,17 @@ class SearchTUI:
                 self.outcome = ("abort", None)
                 break
 
+    def _collect_details(self) -> bool:
+        changed = False
+        for idx in [idx for idx, future in self.pending.items() if future.done()]:
+            future = self.pending.pop(idx)
+            # Best effort: a failed lookup just leaves the runtime unknown.
+            detail = future.result() if future.exception() is None else None
+            if detail:
+                self.results[idx]["duration_minutes"] = detail.get("duration_minutes")
+                changed = True
+        return changed
+
     def _init_colors(self) -> None:
         if not curses.has_colors():
             self.colors = {
@@ -535,8 +945,12 @@ class SearchTUI:
 
     def _draw(self, stdscr: "curses._CursesWindow", height: int, width: int) -> None:  # type: ignore[name-defined]
         self.context["_cached_height"] = height
+        colors = self.colors
+        info_attr = colors.get("info", curses.A_NORMAL)
+        dim_info_attr = colors.get("info", curses.A_DIM)
+        year_attr = colors.get("year", curses.A_BOLD)
         progress_line = self._build_progress_line()
-        self._addstr(stdscr, 0, 0, progress_line.ljust(width), self.colors.get("progress", curses.A_BOLD))
+        self._addstr(stdscr, 0, 0, progress_line.ljust(width), colors.get("progress", curses.A_BOLD), width)
         self._draw_progress_bar(stdscr, 1, width)
 
         file_line, query_line, duration_line = self._build_header_lines(width)
@@ -546,8 +960,8 @@ class SearchTUI:
             0,
             file_line[0],
             file_line[1],
-            self.colors.get("info", curses.A_NORMAL) | curses.A_BOLD,
-            self.colors.get("year", curses.A_BOLD),
+            info_attr | curses.A_BOLD,
+            year_attr,
             width,
         )
         self._write_highlighted(
@@ -556,8 +970,8 @@ class SearchTUI:
             0,
             query_line[0],
             query_line[1],
-            self.colors.get("info", curses.A_NORMAL),
-            self.colors.get("year", curses.A_BOLD),
+            info_attr,
+            year_attr,
             width,
         )
         self._addstr(
@@ -565,16 +979,17 @@ class SearchTUI:
             4,
             0,
             duration_line[:width],
-            self.colors.get("info", curses.A_DIM),
+            dim_info_attr,
+            width,
         )
 
         skip_label = "Skip (s)"
         if self.suggest_skip:
             skip_label = "Skip (s) – suggested (already matches)"
-        skip_attr = self.colors.get("info", curses.A_DIM)
+        skip_attr = dim_info_attr
         if self.selected == -1:
-            skip_attr = self.colors.get("skip", curses.A_BOLD)
-        self._addstr(stdscr, 5, 0, skip_label[:width], skip_attr)
+            skip_attr = colors.get("skip", curses.A_BOLD)
+        self._addstr(stdscr, 5, 0, skip_label[:width], skip_attr, width)
 
         start_row = self._list_start_row(height)
         visible = max(1, (height - start_row - 3) // 2)
@@ -584,11 +999,11 @@ class SearchTUI:
             result = self.results[idx]
             title_line, highlight = self._build_result_title(idx, result)
             segments = self._build_result_detail(result)
-            base_attr = self.colors.get("info", curses.A_NORMAL)
-            highlight_attr = self.colors.get("year", curses.A_BOLD)
-            secondary_attr = self.colors.get("url", curses.A_DIM)
+            base_attr = info_attr
+            highlight_attr = year_attr
+            secondary_attr = colors.get("url", curses.A_DIM)
             if idx == self.selected:
-                base_attr = self.colors.get("selected", curses.A_REVERSE | curses.A_BOLD)
+                base_attr = colors.get("selected", curses.A_REVERSE | curses.A_BOLD)
                 highlight_attr = base_attr | curses.A_BOLD
                 secondary_attr = base_attr | curses.A_DIM
             self._write_highlighted(stdscr, row, 0, title_line, highlight, base_attr, highlight_attr, width)
@@ -596,7 +1011,7 @@ class SearchTUI:
             row += 2
 
         instructions = "↑/↓ navigate • Enter accept • r refine • s skip • q abort"
-        self._addstr(stdscr, height - 1, 0, instructions[:width], curses.A_DIM)
+        self._addstr(stdscr, height - 1, 0, instructions[:width], curses.A_DIM, width)
 
     def _draw_progress_bar(self, window: "curses._CursesWindow", row: int, width: int) -> None:  # type: ignore[name-defined]
         if width <= 0:
@@ -604,7 +1019,7 @@ class SearchTUI:
         progress = self.context.get("progress") or {}
         total = progress.get("total") or 0
         counts = progress.get("counts") or {}
-        completed = sum(counts.values()) if isinstance(counts, dict) else 0
+        completed = sum(counts.values()) if isinstance(counts, Mapping) else 0
         ratio = 0.0
         if total:
             ratio = max(0.0, min(completed / total, 1.0))
@@ -615,7 +1030,7 @@ class SearchTUI:
         percent = f" {int(round(ratio * 100)):3d}%"
         line = (bar + percent)[:width]
         attr = self.colors.get("progress_bar", self.colors.get("progress", curses.A_BOLD))
-        self._addstr(window, row, 0, line, attr)
+        self._addstr(window, row, 0, line, attr, width)
 
     def _build_progress_line(self) -> str:
         progress = self.context.get("progress") or {}
@@ -703,9 +1118,18 @@ class SearchTUI:
             append_segment(url, self.colors.get("url"))
         return segments
 
-    def _addstr(self, window: "curses._CursesWindow", y: int, x: int, text: str, attr: int) -> None:  # type: ignore[name-defined]
+    def _addstr(
+        self,
+        window: "curses._CursesWindow",  # type: ignore[name-defined]
+        y: int,
+        x: int,
+        text: str,
+        attr: int,
+        maxw: Optional[int] = None,
+    ) -> None:
+        limit = (maxw if maxw is not None else window.getmaxyx()[1]) - x
         try:
-            window.addnstr(y, x, text, max(0, window.getmaxyx()[1] - x), attr)
+            window.addnstr(y, x, text, max(0, limit), attr)
         except curses.error:
             pass
 
@@ -724,15 +1148,15 @@ class SearchTUI:
             return
         segment = text[: max(0, width - x)]
         if not highlight or highlight not in segment:
-            self._addstr(window, y, x, segment, base_attr)
+            self._addstr(window, y, x, segment, base_attr, width)
             return
         idx = segment.find(highlight)
         before = segment[:idx]
         match = segment[idx : idx + len(highlight)]
         after = segment[idx + len(highlight) :]
-        self._addstr(window, y, x, before, base_attr)
-        self._addstr(window, y, x + len(before), match, highlight_attr)
-        self._addstr(window, y, x + len(before) + len(match), after, base_attr)
+        self._addstr(window, y, x, before, base_attr, width)
+        self._addstr(window, y, x + len(before), match, highlight_attr, width)
+        self._addstr(window, y, x + len(before) + len(match), after, base_attr, width)
 
     def _write_segments(
         self,
@@ -745,16 +1169,23 @@ class SearchTUI:
     ) -> None:
         if width <= 0:
             return
-        cursor = x
-        max_x = x + max(0, width)
+        runs: List[Tuple[List[str], int]] = []
         for text, attr in segments:
             if not text:
                 continue
+            attr = attr or default_attr
+            if runs and runs[-1][1] == attr:
+                runs[-1][0].append(text)
+            else:
+                runs.append(([text], attr))
+        cursor = x
+        max_x = x + max(0, width)
+        for parts, attr in runs:
+            text = "".join(parts)
             slice_len = max(0, min(len(text), max_x - cursor))
             if slice_len <= 0:
                 break
-            segment_text = text[:slice_len]
-            self._addstr(window, y, cursor, segment_text, attr or default_attr)
+            self._addstr(window, y, cursor, text[:slice_len], attr, max_x)
             cursor += slice_len
 
 
@@ -765,8 +1196,45 @@ def select_result_tui(
 ) -> Tuple[str, Optional[dict]]:
     if not results:
         return ("skip", None)
-    tui = SearchTUI(query, results, context)
-    return tui.run()
+    # Show the list straight away and fill in CSFD runtimes as the detail pages arrive.
+    for item in results:
+        item.setdefault("duration_minutes", None)
+    pool = ThreadPoolExecutor(max_workers=min(len(results), MAX_DETAIL_FETCH_WORKERS))
+    try:
+        details = [pool.submit(fetch_csfd_detail, item.get("url", "")) for item in results]
+        tui = SearchTUI(query, results, context, details)
+        return tui.run()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _current_name_bases(ctx: dict) -> Iterator[str]:
+    file_path = ctx.get("file_path")
+    if isinstance(file_path, str) and file_path:
+        yield sanitize_component(os.path.splitext(os.path.basename(file_path))[0])
+        yield sanitize_component(os.path.basename(os.path.dirname(file_path)))
+    display_name = ctx.get("display_name")
+    if isinstance(display_name, str) and display_name:
+        yield sanitize_component(display_name)
+
+
+class _CurrentNames:
+    """Sanitised current names, produced on demand and kept across refine rounds."""
+
+    def __init__(self, ctx: dict) -> None:
+        self._pending = _current_name_bases(ctx)
+        self._seen: List[str] = []
+
+    def include(self, expected: str) -> bool:
+        if expected in self._seen:
+            return True
+        for base in self._pending:
+            if not base:
+                continue
+            self._seen.append(base)
+            if base == expected:
+                return True
+        return False
 
 
 def interactive_select_title(
@@ -783,8 +1251,11 @@ def interactive_select_title(
     ctx.setdefault("derived_query", query)
     current_query = query
     pending_auto_choice = auto_choice
+    current_names = _CurrentNames(ctx)
     while True:
-        results = fetch_csfd_results(current_query, max_results)
+        results = ctx.pop("prefetched_results", None)
+        if results is None:
+            results = fetch_csfd_results(current_query, max_results)
         if not results:
             print(f"No CSFD matches for '{current_query}'.", file=sys.stderr)
             current_query = prompt("Enter new search term (blank to cancel): ").strip()
@@ -792,31 +1263,22 @@ def interactive_select_title(
                 return None
             pending_auto_choice = None
             continue
-        enriched_results = enrich_csfd_results(results)
         suggest_skip = bool(ctx.get("suggest_skip"))
-        if not suggest_skip and enriched_results:
-            first = enriched_results[0]
+        # An --auto-choice pick ignores the suggestion, so only work it out when it can be shown or auto-skip.
+        if not suggest_skip and pending_auto_choice is None:
+            first = results[0]
             expected = format_media_name(first.get("title", ""), first.get("year"))
             if expected:
-                file_path = ctx.get("file_path")
-                current_bases: List[str] = []
-                if isinstance(file_path, str) and file_path:
-                    file_base = sanitize_component(os.path.splitext(os.path.basename(file_path))[0])
-                    current_bases.append(file_base)
-                    parent = os.path.basename(os.path.dirname(file_path))
-                    current_bases.append(sanitize_component(parent))
-                display_name = ctx.get("display_name")
-                if isinstance(display_name, str) and display_name:
-                    current_bases.append(sanitize_component(display_name))
-                suggest_skip = any(base == expected for base in current_bases if base)
+                suggest_skip = current_names.include(expected)
         ctx["suggest_skip"] = suggest_skip
         ctx["current_query"] = current_query
         if suggest_skip and auto_skip_matches and pending_auto_choice is None:
             ctx["auto_skipped"] = True
             return None
+        # Runtimes are only displayed, so they are fetched only when a list is shown.
         if pending_auto_choice is not None:
             action, selection = select_result_simple(
-                enriched_results,
+                results,
                 current_query,
                 pending_auto_choice,
                 suggest_skip=suggest_skip,
@@ -824,17 +1286,17 @@ def interactive_select_title(
         else:
             if supports_curses():
                 try:
-                    action, selection = select_result_tui(enriched_results, current_query, ctx)
+                    action, selection = select_result_tui(results, current_query, ctx)
                 except TUIError:
                     action, selection = select_result_simple(
-                        enriched_results,
+                        enrich_csfd_results(results),
                         current_query,
                         None,
                         suggest_skip=suggest_skip,
                     )
             else:
                 action, selection = select_result_simple(
-                    enriched_results,
+                    enrich_csfd_results(results),
                     current_query,
                     None,
                     suggest_skip=suggest_skip,
@@ -862,21 +1324,24 @@ def interactive_select_title(
 
 
 def sanitize_component(text: str) -> str:
-    cleaned = INVALID_FILENAME_CHARS.sub(" ", text)
-    cleaned = cleaned.replace("\t", " ")
-    cleaned = WHITESPACE.sub(" ", cleaned)
-    return cleaned.strip(" .")
+    # split() also turns tabs and other whitespace runs into single spaces.
+    return " ".join(text.translate(INVALID_FILENAME_TABLE).split()).strip(" .")
 
 
 def format_media_name(title: str, year: Optional[int]) -> str:
-    base_title = WHITESPACE.sub(" ", title).strip()
+    base_title = " ".join(title.split())
     formatted = f"{base_title} ({year})" if year else base_title
     return sanitize_component(formatted)
 
 
 def is_video_file(path: str) -> bool:
-    _, ext = os.path.splitext(path)
-    return ext.lower() in VIDEO_EXTENSIONS
+    # Same answer as splitext(): only the suffix is lowercased, and a name made
+    # of dots before the suffix (".mkv", "..mkv") has no extension.
+    dot = path.rfind(".")
+    if dot < 0 or path[dot:].lower() not in VIDEO_EXTENSIONS:
+        return False
+    head = path[:dot].rstrip(".")
+    return bool(head) and head[-1] not in PATH_SEPARATORS
 
 
 def find_year_hint(*candidates: str) -> Optional[int]:
@@ -890,12 +1355,10 @@ def find_year_hint(*candidates: str) -> Optional[int]:
 
 
 def guess_search_query(file_path: str) -> str:
-    filename = os.path.basename(file_path)
-    directory = os.path.basename(os.path.dirname(file_path))
-    query = derive_search_query(filename)
+    query = derive_search_query(os.path.basename(file_path))
     if query:
         return query
-    return derive_search_query(directory)
+    return derive_search_query(os.path.basename(os.path.dirname(file_path)))
 
 
 def rename_media_paths(
@@ -909,16 +1372,20 @@ def rename_media_paths(
     filename = os.path.basename(file_path)
     _, ext = os.path.splitext(filename)
     root_abs = os.path.abspath(root_path)
-    dir_abs = os.path.abspath(dir_path)
+    original_dir_abs = dir_abs = os.path.abspath(dir_path)
     dir_change: Optional[Tuple[str, str]] = None
     if dir_abs == root_abs:
         target_dir_parent = dir_path
+        target_dir_parent_abs = dir_abs
     else:
         target_dir_parent = os.path.dirname(dir_path)
+        target_dir_parent_abs = os.path.dirname(dir_abs)
     target_dir = os.path.join(target_dir_parent, base_name)
-    target_dir_abs = os.path.abspath(target_dir)
+    # base_name is a single sanitized component, so joining keeps the path normalised.
+    target_dir_abs = os.path.join(target_dir_parent_abs, base_name)
     changed = False
     renamed_directory = False
+    created_directory = False
     if dir_abs != target_dir_abs:
         if dir_abs != root_abs and not os.path.exists(target_dir):
             os.rename(dir_path, target_dir)
@@ -927,10 +1394,14 @@ def rename_media_paths(
             dir_path = target_dir
             dir_abs = target_dir_abs
             renamed_directory = True
-            current_path = os.path.join(dir_path, os.path.basename(current_path))
+            current_path = os.path.join(dir_path, filename)
         else:
-            if not os.path.exists(target_dir):
-                os.makedirs(target_dir, exist_ok=True)
+            try:
+                os.makedirs(target_dir)
+                created_directory = True
+            except FileExistsError:
+                if not os.path.isdir(target_dir):
+                    raise
             dir_path = target_dir
             dir_abs = target_dir_abs
     if dir_abs == target_dir_abs:
@@ -939,18 +1410,19 @@ def rename_media_paths(
     target_filename = sanitize_component(target_filename)
     target_path = os.path.join(dir_path, target_filename)
     if target_path != current_path:
-        if os.path.exists(target_path):
+        # rename() would silently replace an existing file, so the check stays,
+        # except in a folder this call just created.
+        if not created_directory and os.path.exists(target_path):
             print(f"  Skipping file rename, target exists: {target_path}", file=sys.stderr)
         else:
-            os.makedirs(dir_path, exist_ok=True)
+            # dir_path is the original, renamed or just-created folder, so it exists.
             os.rename(current_path, target_path)
             print(f"  File renamed:\n    {current_path}\n    -> {target_path}")
             current_path = target_path
             changed = True
-    original_dir_abs = os.path.abspath(original_dir)
     if (
         not renamed_directory
-        and original_dir_abs != os.path.abspath(dir_path)
+        and original_dir_abs != dir_abs
         and original_dir_abs != root_abs
     ):
         # Cleanup empty original directory if we moved the file into a new folder.
@@ -962,14 +1434,11 @@ def rename_media_paths(
     return current_path, dir_change, changed
 
 
-def remap_path(path: str, mapping: dict[str, str]) -> str:
-    if not mapping:
-        return path
-    for old in sorted(mapping.keys(), key=len, reverse=True):
-        new = mapping[old]
-        if path == old or path.startswith(old + os.sep):
-            return new + path[len(old) :]
-    return path
+def prefetch_lookup(file_path: str, limit: int) -> Tuple[str, List[dict]]:
+    # Runs ahead in a worker thread for --auto-choice; warms the duration cache too.
+    get_media_duration(file_path)
+    query = guess_search_query(file_path)
+    return query, fetch_csfd_results(query, limit) if query else []
 
 
 def process_media_file(
@@ -977,6 +1446,7 @@ def process_media_file(
     root_path: str,
     args: argparse.Namespace,
     progress: Optional[dict] = None,
+    prefetched: Optional[Future] = None,
 ) -> Tuple[str, str, Optional[Tuple[str, str]]]:
     if not os.path.exists(file_path):
         print(f"Missing file, skipping: {file_path}", file=sys.stderr)
@@ -998,6 +1468,11 @@ def process_media_file(
         "progress": progress or {},
         "derived_query": query,
     }
+    if prefetched is not None:
+        prefetched_query, prefetched_results = prefetched.result()
+        # A directory rename can change the query derived from the folder name.
+        if prefetched_query == query:
+            context["prefetched_results"] = prefetched_results
     if progress and not supports_curses():
         total = progress.get("total")
         counts = progress.get("counts", {})
@@ -1044,14 +1519,28 @@ def process_media_file(
     return (outcome, new_file_path, dir_change)
 
 
-def iter_video_files(root_path: str) -> List[str]:
-    matches: List[str] = []
-    for current_root, dirnames, files in os.walk(root_path):
-        dirnames.sort()
-        for name in sorted(files):
-            if is_video_file(name):
-                matches.append(os.path.join(current_root, name))
-    return matches
+def iter_video_files(root_path: str) -> Iterator[str]:
+    # Same order as a sorted top-down os.walk: a folder's files, then its subfolders.
+    stack = [root_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs: List[str] = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # Like os.walk, symlinked folders are not descended into.
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif is_video_file(entry.name):
+                yield entry.path
+        stack.extend(reversed(subdirs))
 
 
 def process_library_path(args: argparse.Namespace) -> int:
@@ -1077,36 +1566,62 @@ def process_library_path(args: argparse.Namespace) -> int:
             print("Aborted by user.", file=sys.stderr)
             return 1
         return 0 if outcome in {"renamed", "unchanged"} else 1
-    files = iter_video_files(root_path)
+    # Progress needs the total up front and renames rewrite later entries, so keep a list.
+    files = list(iter_video_files(root_path))
     if not files:
         print(f"No supported video files under: {root_path}", file=sys.stderr)
         return 1
-    dir_mapping: dict[str, str] = {}
     stats = {"renamed": 0, "unchanged": 0, "skipped": 0}
+    # Progress consumers only read the counts, so they share one live view.
+    stats_view = types.MappingProxyType(stats)
+    # Without prompts the per-file cost is the CSFD search and ffprobe, so those
+    # run ahead in worker threads; selection and renames stay on this thread, in order.
+    lookahead: Optional[ThreadPoolExecutor] = None
+    lookups: deque = deque()
+    queued = 0
+    if args.auto_choice is not None:
+        lookahead = ThreadPoolExecutor(max_workers=min(len(files), MAX_PREFETCH_WORKERS))
     try:
         for idx in range(len(files)):
-            mapped_path = remap_path(files[idx], dir_mapping)
+            prefetched = None
+            if lookahead is not None:
+                # Only a fixed window runs ahead; topping it up here also picks up
+                # paths rewritten by the folder renames so far.
+                while queued < len(files) and len(lookups) < PREFETCH_WINDOW:
+                    lookups.append(lookahead.submit(prefetch_lookup, files[queued], args.max_results))
+                    queued += 1
+                prefetched = lookups.popleft()
             progress_info = {
                 "current_index": idx + 1,
                 "total": len(files),
-                "counts": dict(stats),
+                "counts": stats_view,
             }
             outcome, new_file_path, dir_change = process_media_file(
-                mapped_path,
+                files[idx],
                 root_path,
                 args,
                 progress=progress_info,
+                prefetched=prefetched,
             )
             stats[outcome] = stats.get(outcome, 0) + 1
             files[idx] = new_file_path
             if dir_change:
+                # Both come from joins under the absolute root_path, so they are
+                # already absolute and normalised.
                 old_dir, new_dir = dir_change
-                dir_mapping[os.path.abspath(old_dir)] = os.path.abspath(new_dir)
-                for j in range(idx + 1, len(files)):
-                    files[j] = remap_path(files[j], dir_mapping)
+                # Only this file's own folder is renamed, and the walk is depth-first,
+                # so the files still under it are the ones straight after it.
+                old_prefix = old_dir + os.sep
+                j = idx + 1
+                while j < len(files) and files[j].startswith(old_prefix):
+                    files[j] = new_dir + files[j][len(old_dir) :]
+                    j += 1
     except UserAbort:
         print("Aborted by user.", file=sys.stderr)
         return 1
+    finally:
+        if lookahead is not None:
+            lookahead.shutdown(wait=False, cancel_futures=True)
     total = len(files)
     print(
         f"\nProcessed {total} file(s): {stats['renamed']} renamed, {stats['unchanged']} already matching, {stats['skipped']} skipped."
@@ -1180,6 +1695,16 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Automatically skip items whose current name already matches the top CSFD hit",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for the persistent CSFD metadata cache (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent CSFD metadata cache.",
+    )
     args = parser.parse_args(argv)
     if args.path:
         if args.filename or args.query:
@@ -1191,9 +1716,13 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     args = parse_args(argv)
-    if args.path:
-        return process_library_path(args)
-    return interactive_lookup(args)
+    configure_caches(None if args.no_cache else args.cache_dir)
+    try:
+        if args.path:
+            return process_library_path(args)
+        return interactive_lookup(args)
+    finally:
+        configure_caches(None)
 
 
 if __name__ == "__main__":